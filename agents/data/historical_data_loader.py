@@ -11,6 +11,7 @@ Capabilities:
 4. update_incremental - Fetch only new bars since last update
 """
 
+import asyncio
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -19,6 +20,7 @@ from typing import Any, Dict, List, Optional
 import yfinance as yf
 from loguru import logger
 from sqlalchemy import select, and_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Add parent directory to path for imports
@@ -27,9 +29,22 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from agents.base_agent import BaseAgent
 from shared.data_models import Message
 from shared.database.connection import get_database
-from shared.database.models import HistoricalPrice, AgentCache, DataQualityLog
-from shared.validators import DataValidator
+from shared.database.models import HistoricalPrice, AgentCache, DataQualityLog, hash_cache_key
+from shared.validators import DataValidator, ValidationError
 
+def _build_historical_price_upsert():
+    """Build an idempotent upsert keyed on the unique (symbol, date, interval) index."""
+    stmt = sqlite_insert(HistoricalPrice)
+    return stmt.on_conflict_do_update(
+        index_elements=[HistoricalPrice.symbol, HistoricalPrice.date, HistoricalPrice.interval],
+        set_={
+            column: stmt.excluded[column]
+            for column in ("open", "high", "low", "close", "volume", "adj_close", "source")
+        },
+    )
+
+
+_UPSERT_HISTORICAL_PRICE = _build_historical_price_upsert()
 
 class HistoricalDataLoader(BaseAgent):
     """Loads historical market data from Yahoo Finance."""
@@ -216,8 +231,11 @@ class HistoricalDataLoader(BaseAgent):
             
             # Fetch from yfinance
             logger.info(f"Fetching history for {symbol} from {start_date} to {end_date or 'now'}")
+            # yfinance blocks on HTTP; run it in a thread so batch loads overlap
             ticker = yf.Ticker(symbol)
-            hist = ticker.history(start=start_dt, end=end_dt, interval=interval)
+            hist = await asyncio.to_thread(
+                ticker.history, start=start_dt, end=end_dt, interval=interval
+            )
             
             if hist.empty:
                 logger.warning(f"No data returned for {symbol}")
@@ -228,20 +246,42 @@ class HistoricalDataLoader(BaseAgent):
             
             # Convert to list of dicts and validate
             bars = []
+            # Pull each column out once as native Python values instead of
+            # building a Series per row
+            opens = hist['Open'].tolist()
+            highs = hist['High'].tolist()
+            lows = hist['Low'].tolist()
+            closes = hist['Close'].tolist()
+            volumes = hist['Volume'].tolist()
+            dates = hist.index.to_pydatetime()
+            # Validate the whole frame in one vectorized pass; invalid rows are
+            # re-checked one at a time for their error message, and rows with a
+            # suspicious spread so validate_ohlc logs its warning
+            recheck_bar = self.validator.invalid_ohlc_frame_mask(hist)
+            recheck_bar |= self.validator.suspicious_spread_mask(
+                hist['High'].to_numpy(), hist['Low'].to_numpy()
+            )
+            # hist.index is already a DatetimeIndex; only missing dates need flagging
+            invalid_date = hist.index.isna()
             async with self.db.get_session() as session:
-                for date, row in hist.iterrows():
+                for i, date in enumerate(dates):
+                    open_price = opens[i]
+                    high = highs[i]
+                    low = lows[i]
+                    close = closes[i]
                     try:
-                        # Validate OHLC
-                        self.validator.validate_ohlc(
-                            open_price=float(row['Open']),
-                            high=float(row['High']),
-                            low=float(row['Low']),
-                            close=float(row['Close'])
-                        )
+                        if invalid_date[i]:
+                            raise ValidationError(f"Invalid date: {date}")
                         
-                        # Validate volume
-                        volume = int(row['Volume'])
-                        self.validator.validate_volume(volume)
+                        volume = int(volumes[i])
+                        if recheck_bar[i]:
+                            self.validator.validate_ohlc(
+                                open_price=open_price,
+                                high=high,
+                                low=low,
+                                close=close
+                            )
+                            self.validator.validate_volume(volume)
                         
                     except Exception as e:
                         # Log validation failure
@@ -257,36 +297,21 @@ class HistoricalDataLoader(BaseAgent):
                     
                     bar_data = {
                         "symbol": symbol,
-                        "date": date.to_pydatetime(),  # Convert pandas Timestamp to Python datetime
-                        "open": float(row['Open']),
-                        "high": float(row['High']),
-                        "low": float(row['Low']),
-                        "close": float(row['Close']),
+                        "date": date,
+                        "open": open_price,
+                        "high": high,
+                        "low": low,
+                        "close": close,
                         "volume": volume,
-                        "adj_close": float(row.get('Close', row['Close'])),  # yfinance auto-adjusts
+                        "adj_close": close,  # yfinance auto-adjusts
                         "interval": interval,
                         "source": "yfinance"
                     }
                     bars.append(bar_data)
-                    
-                    # Store in database (check for existing record first)
-                    from sqlalchemy import select
-                    stmt = select(HistoricalPrice).where(
-                        HistoricalPrice.symbol == bar_data['symbol'],
-                        HistoricalPrice.date == bar_data['date'],
-                        HistoricalPrice.interval == bar_data['interval']
-                    )
-                    result = await session.execute(stmt)
-                    existing = result.scalar_one_or_none()
-                    
-                    if existing:
-                        # Update existing record
-                        for key, value in bar_data.items():
-                            setattr(existing, key, value)
-                    else:
-                        # Insert new record
-                        hist_price = HistoricalPrice(**bar_data)
-                        session.add(hist_price)
+                
+                # Store in database, updating bars that already exist
+                if bars:
+                    await session.execute(_UPSERT_HISTORICAL_PRICE, bars)
                 
                 await session.commit()
             
@@ -360,13 +385,23 @@ class HistoricalDataLoader(BaseAgent):
         success_count = 0
         fail_count = 0
         
-        for symbol in symbols:
-            result = await self._handle_load_history({
-                "symbol": symbol,
-                "start_date": start_date,
-                "end_date": end_date,
-                "interval": interval
-            })
+        # Symbols are independent, so load them concurrently
+        loaded = await asyncio.gather(
+            *(
+                self._handle_load_history({
+                    "symbol": symbol,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "interval": interval
+                })
+                for symbol in symbols
+            ),
+            return_exceptions=True,
+        )
+        
+        for symbol, result in zip(symbols, loaded):
+            if isinstance(result, Exception):
+                result = {"success": False, "error": str(result)}
             
             results[symbol] = result
             if result["success"]:
@@ -524,6 +559,8 @@ class HistoricalDataLoader(BaseAgent):
                 stmt = select(AgentCache).where(
                     and_(
                         AgentCache.agent_id == self.agent_id,
+                        AgentCache.cache_key_hash == hash_cache_key(cache_key),
+                        # The digest narrows the lookup; the key guards against collisions
                         AgentCache.cache_key == cache_key,
                         AgentCache.expires_at > datetime.utcnow()
                     )
@@ -542,12 +579,13 @@ class HistoricalDataLoader(BaseAgent):
     async def _save_to_cache(self, cache_key: str, data: List[Dict]):
         """Save data to cache with TTL."""
         try:
+            key_hash = hash_cache_key(cache_key)
             async with self.db.get_session() as session:
                 # Delete old cache entry if exists
                 stmt = select(AgentCache).where(
                     and_(
                         AgentCache.agent_id == self.agent_id,
-                        AgentCache.cache_key == cache_key
+                        AgentCache.cache_key_hash == key_hash
                     )
                 )
                 result = await session.execute(stmt)
@@ -570,6 +608,7 @@ class HistoricalDataLoader(BaseAgent):
                 cache_entry = AgentCache(
                     agent_id=self.agent_id,
                     cache_key=cache_key,
+                    cache_key_hash=key_hash,
                     cache_value=json.dumps(data, default=json_serial),
                     expires_at=datetime.utcnow() + self.cache_ttl
                 )
@@ -19,6 +19,7 @@ from typing import Any, Dict, List, Optional
 import yfinance as yf
 from loguru import logger
 from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -398,20 +399,27 @@ class MarketDataFetcher(BaseAgent):
             quote_data: Quote data to store
         """
         try:
-            quote = MarketQuote(
-                symbol=quote_data["symbol"],
-                timestamp=quote_data["timestamp"],
-                price=quote_data["price"],
-                bid=quote_data.get("bid"),
-                ask=quote_data.get("ask"),
-                bid_size=quote_data.get("bid_size"),
-                ask_size=quote_data.get("ask_size"),
-                volume=quote_data.get("volume"),
-                source=quote_data.get("source", "unknown"),
+            values = {
+                "symbol": quote_data["symbol"],
+                "timestamp": quote_data["timestamp"],
+                "price": quote_data["price"],
+                "bid": quote_data.get("bid"),
+                "ask": quote_data.get("ask"),
+                "bid_size": quote_data.get("bid_size"),
+                "ask_size": quote_data.get("ask_size"),
+                "volume": quote_data.get("volume"),
+                "source": quote_data.get("source", "unknown"),
+            }
+            
+            # Idempotent upsert keyed on (symbol, timestamp)
+            stmt = sqlite_insert(MarketQuote).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MarketQuote.symbol, MarketQuote.timestamp],
+                set_={key: stmt.excluded[key] for key in values if key not in ("symbol", "timestamp")},
             )
             
             async with self.db.get_session() as session:
-                session.add(quote)
+                await session.execute(stmt)
                 await session.commit()
             
             logger.debug(f"Stored quote for {quote_data['symbol']} in database")
@@ -9,14 +9,20 @@ Checkpoint: CHECKPOINT-1
 """
 
 import sys
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 from loguru import logger
-from sqlalchemy import and_, select
+from sqlalchemy import bindparam, select
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; NumPy/pandas equivalents are used instead
+    njit = None
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
@@ -26,6 +32,135 @@ from shared.database.connection import get_database
 from shared.database.models import HistoricalPrice
 
 
+def _period_error(name: str, value: Any) -> Optional[str]:
+    """Return an error message unless value is a usable moving-average period."""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        return f"{name} must be a positive integer, got {value!r}"
+    return None
+
+
+# Built once at import so every call hits SQLAlchemy's compiled-statement cache
+# The latest bar's close and volume are selected too, so an in-place revision
+# of that bar changes the result-cache key
+_LATEST_BAR_STMT = (
+    select(HistoricalPrice.date, HistoricalPrice.close, HistoricalPrice.volume)
+    .where(HistoricalPrice.symbol == bindparam("symbol"))
+    .order_by(HistoricalPrice.date.desc())
+    .limit(1)
+)
+
+_PRICE_RANGE_STMT = (
+    select(
+        HistoricalPrice.date,
+        HistoricalPrice.open,
+        HistoricalPrice.high,
+        HistoricalPrice.low,
+        HistoricalPrice.close,
+        HistoricalPrice.volume,
+    )
+    .where(
+        HistoricalPrice.symbol == bindparam("symbol"),
+        HistoricalPrice.date >= bindparam("start_date"),
+        HistoricalPrice.date <= bindparam("end_date"),
+    )
+    .order_by(HistoricalPrice.date)
+)
+
+_PRICE_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+
+def _sma_incremental(close: np.ndarray, period: int) -> np.ndarray:
+    """
+    Simple moving average from a cumulative sum, NaN until the first full window.
+    
+    Each window is the difference of two prefix sums, so the cost is O(N)
+    regardless of the period. NaN closes are summed as zero and counted
+    separately, so, like pandas rolling(period).mean(), a window containing
+    NaN is NaN and later windows are unaffected.
+    """
+    if period < 1:
+        raise ValueError("period must be at least 1")
+    out = np.full(close.shape[0], np.nan)
+    if close.shape[0] >= period:
+        missing = np.isnan(close)
+        cs = np.cumsum(np.where(missing, 0.0, close))
+        nan_cs = np.cumsum(missing)
+        window_sum = cs[period - 1:] - np.concatenate(([0.0], cs[:-period]))
+        window_nan = nan_cs[period - 1:] - np.concatenate(([0], nan_cs[:-period]))
+        out[period - 1:] = np.where(window_nan == 0, window_sum / period, np.nan)
+    return out
+
+
+def _ema_pandas(close: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average seeded with the first close (adjust=False)."""
+    return pd.Series(close).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _sma_loop(close, period):
+        """
+        Running-sum SMA: one add and one subtract per bar.
+        
+        Like pandas rolling(period).mean(), a window containing NaN is NaN and
+        the average recovers once the NaN leaves the window.
+        """
+        if period < 1:
+            raise ValueError("period must be at least 1")
+        n = close.shape[0]
+        out = np.full(n, np.nan)
+        total = 0.0
+        nan_count = 0
+        for i in range(n):
+            x = close[i]
+            if np.isnan(x):
+                nan_count += 1
+            else:
+                total += x
+            if i >= period:
+                y = close[i - period]
+                if np.isnan(y):
+                    nan_count -= 1
+                else:
+                    total -= y
+            if i >= period - 1 and nan_count == 0:
+                out[i] = total / period
+        return out
+    
+    @njit(cache=True)
+    def _ema_loop(close, span):
+        """
+        Recursive EMA, matching pandas ewm(span=span, adjust=False).
+        
+        NaN closes are skipped the way pandas does (ignore_na=False): the
+        previous average is carried forward and decays by one step per gap.
+        """
+        if span < 1:
+            raise ValueError("span must be at least 1")
+        n = close.shape[0]
+        out = np.empty(n)
+        if n == 0:
+            return out
+        alpha = 2.0 / (span + 1.0)
+        weighted = close[0]
+        old_weight = 1.0
+        out[0] = weighted
+        for i in range(1, n):
+            x = close[i]
+            if not np.isnan(weighted):
+                old_weight *= 1.0 - alpha
+                if not np.isnan(x):
+                    weighted = (old_weight * weighted + alpha * x) / (old_weight + alpha)
+                    old_weight = 1.0
+            elif not np.isnan(x):
+                weighted = x
+            out[i] = weighted
+        return out
+else:
+    _sma_loop = _sma_incremental
+    _ema_loop = _ema_pandas
+
+
 class MovingAverageCalculator(BaseAgent):
     """
     Agent #13: Moving Average Calculator
@@ -34,10 +169,16 @@ class MovingAverageCalculator(BaseAgent):
     Optimized for long-term investing strategies.
     """
     
+    # Number of SMA/EMA results kept in the in-process LRU cache
+    RESULT_CACHE_SIZE = 128
+    
     def __init__(self):
         """Initialize the Moving Average Calculator agent."""
         super().__init__()
         self.db = get_database()
+        # Keyed by (kind, symbol, period, lookback_days, latest bar), so newly
+        # loaded or revised latest bars never serve a stale result
+        self._result_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
     
     async def initialize(self):
         """Initialize database connection."""
@@ -107,28 +248,39 @@ class MovingAverageCalculator(BaseAgent):
             
             if not symbol:
                 return {"error": "Symbol is required"}
+            error = _period_error('period', period)
+            if error:
+                return {"error": error}
+            
+            latest_bar = await self._latest_bar(symbol)
+            end_date = latest_bar[0] if latest_bar is not None else None
+            cache_key = ('sma', symbol, period, lookback_days, latest_bar)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return {**cached, 'timestamp': datetime.utcnow().isoformat()}
             
             # Fetch historical data
-            df = await self._fetch_historical_data(symbol, lookback_days)
+            df = await self._fetch_historical_data(symbol, lookback_days, end_date)
             
             if len(df) < period:
                 return {"error": f"Insufficient data: need {period} days, got {len(df)}"}
             
             # Calculate SMA
-            df['sma'] = df['close'].rolling(window=period).mean()
+            df['sma'] = _sma_loop(df['close'].to_numpy(dtype=np.float64), period)
             
             current_price = float(df['close'].iloc[-1])
             current_sma = float(df['sma'].iloc[-1])
             
-            return {
+            result = {
                 'symbol': symbol,
                 'period': period,
                 'current_price': round(current_price, 2),
                 'current_sma': round(current_sma, 2),
                 'price_above_sma': current_price > current_sma,
                 'distance_pct': round(((current_price - current_sma) / current_sma) * 100, 2),
-                'timestamp': datetime.utcnow().isoformat()
             }
+            self._cache_put(cache_key, result)
+            return {**result, 'timestamp': datetime.utcnow().isoformat()}
         
         except Exception as e:
             logger.error(f"Error calculating SMA: {e}", exc_info=True)
@@ -143,27 +295,38 @@ class MovingAverageCalculator(BaseAgent):
             
             if not symbol:
                 return {"error": "Symbol is required"}
+            error = _period_error('period', period)
+            if error:
+                return {"error": error}
             
-            df = await self._fetch_historical_data(symbol, lookback_days)
+            latest_bar = await self._latest_bar(symbol)
+            end_date = latest_bar[0] if latest_bar is not None else None
+            cache_key = ('ema', symbol, period, lookback_days, latest_bar)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return {**cached, 'timestamp': datetime.utcnow().isoformat()}
+            
+            df = await self._fetch_historical_data(symbol, lookback_days, end_date)
             
             if len(df) < period:
                 return {"error": f"Insufficient data: need {period} days, got {len(df)}"}
             
             # Calculate EMA
-            df['ema'] = df['close'].ewm(span=period, adjust=False).mean()
+            df['ema'] = _ema_loop(df['close'].to_numpy(dtype=np.float64), period)
             
             current_price = float(df['close'].iloc[-1])
             current_ema = float(df['ema'].iloc[-1])
             
-            return {
+            result = {
                 'symbol': symbol,
                 'period': period,
                 'current_price': round(current_price, 2),
                 'current_ema': round(current_ema, 2),
                 'price_above_ema': current_price > current_ema,
                 'distance_pct': round(((current_price - current_ema) / current_ema) * 100, 2),
-                'timestamp': datetime.utcnow().isoformat()
             }
+            self._cache_put(cache_key, result)
+            return {**result, 'timestamp': datetime.utcnow().isoformat()}
         
         except Exception as e:
             logger.error(f"Error calculating EMA: {e}", exc_info=True)
@@ -180,19 +343,22 @@ class MovingAverageCalculator(BaseAgent):
             
             if not symbol:
                 return {"error": "Symbol is required"}
+            for name, value in (('fast_period', fast_period), ('slow_period', slow_period)):
+                error = _period_error(name, value)
+                if error:
+                    return {"error": error}
             
             df = await self._fetch_historical_data(symbol, lookback_days)
             
-            if len(df) < slow_period:
-                return {"error": f"Insufficient data: need {slow_period} days, got {len(df)}"}
+            longest_period = max(fast_period, slow_period)
+            if len(df) < longest_period:
+                return {"error": f"Insufficient data: need {longest_period} days, got {len(df)}"}
             
             # Calculate MAs
-            if ma_type == 'sma':
-                df['fast_ma'] = df['close'].rolling(window=fast_period).mean()
-                df['slow_ma'] = df['close'].rolling(window=slow_period).mean()
-            else:
-                df['fast_ma'] = df['close'].ewm(span=fast_period, adjust=False).mean()
-                df['slow_ma'] = df['close'].ewm(span=slow_period, adjust=False).mean()
+            close = df['close'].to_numpy(dtype=np.float64)
+            ma = _sma_loop if ma_type == 'sma' else _ema_loop
+            df['fast_ma'] = ma(close, fast_period)
+            df['slow_ma'] = ma(close, slow_period)
             
             # Detect crossover
             df['crossover'] = np.where(df['fast_ma'] > df['slow_ma'], 1, -1)
@@ -250,12 +416,13 @@ class MovingAverageCalculator(BaseAgent):
                 return {"error": f"Insufficient data: need 200 days, got {len(df)}"}
             
             # Calculate all standard MAs
-            df['sma_20'] = df['close'].rolling(window=20).mean()
-            df['sma_50'] = df['close'].rolling(window=50).mean()
-            df['sma_100'] = df['close'].rolling(window=100).mean()
-            df['sma_200'] = df['close'].rolling(window=200).mean()
-            df['ema_12'] = df['close'].ewm(span=12, adjust=False).mean()
-            df['ema_26'] = df['close'].ewm(span=26, adjust=False).mean()
+            close = df['close'].to_numpy(dtype=np.float64)
+            df['sma_20'] = _sma_loop(close, 20)
+            df['sma_50'] = _sma_loop(close, 50)
+            df['sma_100'] = _sma_loop(close, 100)
+            df['sma_200'] = _sma_loop(close, 200)
+            df['ema_12'] = _ema_loop(close, 12)
+            df['ema_26'] = _ema_loop(close, 26)
             
             current_price = float(df['close'].iloc[-1])
             
@@ -323,55 +490,66 @@ class MovingAverageCalculator(BaseAgent):
             logger.error(f"Error calculating all MAs: {e}", exc_info=True)
             return {"error": str(e)}
     
-    async def _fetch_historical_data(self, symbol: str, lookback_days: int) -> pd.DataFrame:
+    def _cache_get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Return a cached result and mark it most recently used, or None."""
+        result = self._result_cache.get(key)
+        if result is not None:
+            self._result_cache.move_to_end(key)
+        return result
+    
+    def _cache_put(self, key: Tuple, result: Dict[str, Any]) -> None:
+        """Cache a result, evicting the least recently used beyond RESULT_CACHE_SIZE."""
+        self._result_cache[key] = result
+        self._result_cache.move_to_end(key)
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+    
+    async def _latest_bar(self, symbol: str) -> Optional[Tuple[datetime, float, int]]:
+        """Return (date, close, volume) of the most recent stored bar for a symbol, or None."""
+        async with self.db.get_session() as session:
+            latest_result = await session.execute(_LATEST_BAR_STMT, {"symbol": symbol})
+            row = latest_result.one_or_none()
+            return tuple(row) if row is not None else None
+    
+    async def _fetch_historical_data(
+        self,
+        symbol: str,
+        lookback_days: int,
+        end_date: Optional[datetime] = None,
+    ) -> pd.DataFrame:
         """
         Fetch historical price data from database.
         
         Note: lookback_days refers to trading days, not calendar days.
         We fetch more data than needed to account for weekends/holidays.
+        
+        Args:
+            symbol: Stock symbol
+            lookback_days: Number of trading days needed
+            end_date: Latest bar date if already known; looked up otherwise
         """
-        async with self.db.get_session() as session:
-            # Get the latest available date for this symbol
-            latest_stmt = select(HistoricalPrice.date).where(
-                HistoricalPrice.symbol == symbol
-            ).order_by(HistoricalPrice.date.desc()).limit(1)
-            
-            latest_result = await session.execute(latest_stmt)
-            latest_row = latest_result.scalar_one_or_none()
-            
-            if not latest_row:
+        if end_date is None:
+            latest_bar = await self._latest_bar(symbol)
+            if latest_bar is None:
                 return pd.DataFrame()  # No data available
-            
-            end_date = latest_row
+            end_date = latest_bar[0]
+        
+        async with self.db.get_session() as session:
             # Use generous calendar day buffer (250 trading days ≈ 365 calendar days)
             calendar_days_buffer = int(lookback_days * 1.5) + 100
             start_date = end_date - timedelta(days=calendar_days_buffer)
             
-            stmt = select(HistoricalPrice).where(
-                and_(
-                    HistoricalPrice.symbol == symbol,
-                    HistoricalPrice.date >= start_date,
-                    HistoricalPrice.date <= end_date
-                )
-            ).order_by(HistoricalPrice.date)
-            
-            result = await session.execute(stmt)
-            prices = result.scalars().all()
+            result = await session.execute(
+                _PRICE_RANGE_STMT,
+                {"symbol": symbol, "start_date": start_date, "end_date": end_date},
+            )
+            # Plain rows rather than ORM objects: nothing here is modified
+            rows = result.all()
             
-            if not prices:
+            if not rows:
                 raise ValueError(f"No historical data found for {symbol}")
             
-            return pd.DataFrame([
-                {
-                    'date': price.date,
-                    'open': price.open,
-                    'high': price.high,
-                    'low': price.low,
-                    'close': price.close,
-                    'volume': price.volume
-                }
-                for price in prices
-            ])
+            return pd.DataFrame.from_records(rows, columns=_PRICE_COLUMNS)
 
 
 # Test function
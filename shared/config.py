@@ -5,6 +5,7 @@ Loads configuration from environment variables and config files.
 """
 
 import os
+from functools import cached_property
 from pathlib import Path
 from typing import Any, Dict, Optional
 
@@ -58,8 +59,16 @@ class Config:
         # Load configurations
         self.agent_config = self._load_agent_config()
         self.claude_config = self._load_claude_config()
-        self.agent_registry_config = self._load_yaml_config("agent_registry.yaml")
-        self.workflows_config = self._load_yaml_config("workflows.yaml")
+    
+    @cached_property
+    def agent_registry_config(self) -> Dict[str, Any]:
+        """Agent registry configuration, loaded on first access."""
+        return self._load_yaml_config("agent_registry.yaml")
+    
+    @cached_property
+    def workflows_config(self) -> Dict[str, Any]:
+        """Workflow configuration, loaded on first access."""
+        return self._load_yaml_config("workflows.yaml")
     
     def _load_agent_config(self) -> AgentConfig:
         """Load agent configuration from environment."""
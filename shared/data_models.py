@@ -2,14 +2,20 @@
 Data models for 100AC agent system.
 
 Defines the core message and agent data structures used throughout the system.
+
+Models use explicit ConfigDict settings rather than class-based Config, and
+leave validate_assignment off so attribute updates are plain writes. Internal,
+high-churn structures that never cross a trust boundary are slotted dataclasses.
 """
 
+import os
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
-from uuid import uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class MessageType(str, Enum):
@@ -30,7 +36,7 @@ class Message(BaseModel):
     consistent parsing and routing.
     """
     
-    message_id: str = Field(default_factory=lambda: str(uuid4()))
+    message_id: str = Field(default_factory=lambda: os.urandom(16).hex())
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     from_agent: str
     to_agent: Optional[str] = None  # None means broadcast
@@ -38,19 +44,19 @@ class Message(BaseModel):
     topic: str
     data: Dict[str, Any]
     correlation_id: Optional[str] = None  # For request-response tracking
+    # Local monotonic creation time for retention checks; never serialized
+    created_ns: int = Field(default_factory=time.monotonic_ns, exclude=True, repr=False)
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(validate_assignment=False)
 
 
-class AgentCapability(BaseModel):
+@dataclass(slots=True)
+class AgentCapability:
     """Describes a specific capability an agent provides."""
     
     name: str
     description: str
-    parameters: Dict[str, str] = Field(default_factory=dict)  # param_name: type
+    parameters: Dict[str, str] = field(default_factory=dict)  # param_name: type
     returns: str = "Dict[str, Any]"
 
 
@@ -80,30 +86,27 @@ class AgentStatus(str, Enum):
     STOPPING = "stopping"
 
 
-class AgentHealth(BaseModel):
+@dataclass(slots=True)
+class AgentHealth:
     """Health and performance metrics for an agent."""
     
     agent_id: str
     status: AgentStatus
-    last_heartbeat: datetime = Field(default_factory=datetime.utcnow)
+    last_heartbeat: datetime = field(default_factory=datetime.utcnow)
     messages_processed: int = 0
     errors_count: int = 0
     average_response_time_ms: float = 0.0
     uptime_seconds: float = 0.0
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
 
 
-class WorkflowStep(BaseModel):
+@dataclass(slots=True)
+class WorkflowStep:
     """A single step in a multi-agent workflow."""
     
     step_id: str
     agent_id: str
     action: str  # Capability name to invoke
-    parameters: Dict[str, Any] = Field(default_factory=dict)
+    parameters: Dict[str, Any] = field(default_factory=dict)
     timeout_seconds: int = 30
     retry_count: int = 0
     on_error: str = "stop"  # stop, continue, retry
@@ -112,13 +115,10 @@ class WorkflowStep(BaseModel):
 class Workflow(BaseModel):
     """Defines a multi-step workflow across agents."""
     
-    workflow_id: str = Field(default_factory=lambda: str(uuid4()))
+    workflow_id: str = Field(default_factory=lambda: os.urandom(16).hex())
     name: str
     description: str
     steps: List[WorkflowStep]
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(validate_assignment=False)
@@ -6,9 +6,10 @@ Provides async database access using SQLAlchemy + aiosqlite.
 
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional, Type
 
 from loguru import logger
+from sqlalchemy import Connection, event, inspect, insert, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -16,7 +17,16 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-from .models import Base
+from .models import Base, MarketQuote
+
+# Per-connection tuning for SQLite: WAL lets readers proceed during writes and
+# NORMAL sync is durable under WAL while avoiding an fsync per commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
 
 
 class Database:
@@ -60,6 +70,9 @@ class Database:
             future=True,
         )
         
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        
         # Create session factory
         self.session_factory = async_sessionmaker(
             self.engine,
@@ -67,9 +80,11 @@ class Database:
             expire_on_commit=False,
         )
         
-        # Create all tables
+        # Create all tables, upgrading databases created by older versions
         async with self.engine.begin() as conn:
+            await conn.run_sync(_upgrade_schema)
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_create_missing_indexes)
         
         logger.info("Database initialized successfully")
     
@@ -103,18 +118,103 @@ class Database:
             finally:
                 await session.close()
     
-    async def execute_raw(self, sql: str) -> None:
+    async def bulk_insert(
+        self,
+        model: Type[Base],
+        rows: List[Dict[str, Any]],
+        chunk_size: int = 1000,
+    ) -> int:
+        """
+        Insert many rows with Core executemany, bypassing the ORM unit of work.
+        
+        All chunks are written in a single transaction.
+        
+        Args:
+            model: Mapped model class to insert into
+            rows: Column name -> value dictionaries
+            chunk_size: Number of rows per executemany call
+        
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        
+        stmt = insert(model)
+        async with self.get_session() as session:
+            for start in range(0, len(rows), chunk_size):
+                await session.execute(stmt, rows[start:start + chunk_size])
+        
+        return len(rows)
+    
+    async def execute_raw(self, sql: str, params: tuple = ()) -> None:
         """
         Execute raw SQL statement.
         
+        The statement is passed straight to the DBAPI driver without SQLAlchemy
+        compilation. Callers are responsible for quoting; use params for values.
+        
         Args:
             sql: SQL statement to execute
+            params: Positional parameters for the driver's placeholders
         """
         if self.engine is None:
             raise RuntimeError("Database not initialized")
         
         async with self.engine.begin() as conn:
-            await conn.execute(sql)
+            await conn.exec_driver_sql(sql, params)
+
+
+def _upgrade_schema(connection: Connection) -> None:
+    """
+    Bring tables created by older versions in line with the models.
+    
+    create_all() never alters existing tables or indexes, so changes it cannot
+    express are applied here before it runs.
+    
+    Args:
+        connection: Connection inside the initialization transaction
+    """
+    inspector = inspect(connection)
+    
+    # agent_cache used to be keyed on the raw cache_key. It only holds cached
+    # data, so an old table is dropped and create_all() builds the new one
+    if inspector.has_table("agent_cache"):
+        columns = {column["name"] for column in inspector.get_columns("agent_cache")}
+        if "cache_key_hash" not in columns:
+            logger.info("Recreating agent_cache with the cache_key_hash column")
+            connection.execute(text("DROP TABLE agent_cache"))
+    
+    if not inspector.has_table("market_quotes"):
+        return
+    
+    # idx_symbol_timestamp used to be non-unique; the ON CONFLICT upsert needs it unique
+    indexes = {index["name"]: index for index in inspector.get_indexes("market_quotes")}
+    old_index = indexes.get("idx_symbol_timestamp")
+    if old_index is not None and not old_index["unique"]:
+        logger.info("Upgrading idx_symbol_timestamp to a unique index")
+        # Keep the most recently inserted quote per (symbol, timestamp)
+        connection.execute(text(
+            "DELETE FROM market_quotes WHERE id NOT IN "
+            "(SELECT MAX(id) FROM market_quotes GROUP BY symbol, timestamp)"
+        ))
+        connection.execute(text("DROP INDEX idx_symbol_timestamp"))
+
+
+def _create_missing_indexes(connection: Connection) -> None:
+    """Create quote indexes absent from a market_quotes table that already existed."""
+    for index in MarketQuote.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply SQLITE_PRAGMAS to each new pooled connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
 
 
 # Global database instance
@@ -4,10 +4,11 @@ Database models for market data storage.
 Uses SQLAlchemy ORM with async support via aiosqlite.
 """
 
+import hashlib
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, Integer, String, Text, Index
+from sqlalchemy import DateTime, Float, Integer, LargeBinary, String, Text, Index
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -16,6 +17,19 @@ class Base(DeclarativeBase):
     pass
 
 
+def hash_cache_key(cache_key: str) -> bytes:
+    """
+    Compute the fixed-size digest used to index AgentCache entries.
+    
+    Args:
+        cache_key: Cache key text
+    
+    Returns:
+        8-byte blake2b digest
+    """
+    return hashlib.blake2b(cache_key.encode(), digest_size=8).digest()
+
+
 class MarketQuote(Base):
     """
     Real-time market quote data.
@@ -46,7 +60,13 @@ class MarketQuote(Base):
     )
     
     __table_args__ = (
-        Index("idx_symbol_timestamp", "symbol", "timestamp"),
+        # Unique so ingestion can upsert with INSERT ... ON CONFLICT
+        Index("idx_symbol_timestamp", "symbol", "timestamp", unique=True),
+        # Covering index for "latest quote per symbol" reads (SQLite has no INCLUDE)
+        Index(
+            "idx_symbol_timestamp_covering",
+            "symbol", "timestamp", "price", "bid", "ask", "bid_size", "ask_size", "volume",
+        ),
     )
 
 
@@ -96,7 +116,12 @@ class AgentCache(Base):
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     agent_id: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
-    cache_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    cache_key: Mapped[str] = mapped_column(String(255), nullable=False)  # Kept for debugging
+    cache_key_hash: Mapped[bytes] = mapped_column(
+        LargeBinary(8),
+        nullable=False,
+        default=lambda context: hash_cache_key(context.get_current_parameters()["cache_key"]),
+    )
     cache_value: Mapped[str] = mapped_column(Text, nullable=False)
     
     # TTL
@@ -109,7 +134,7 @@ class AgentCache(Base):
     extra_info: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     __table_args__ = (
-        Index("idx_agent_cache_key", "agent_id", "cache_key", unique=True),
+        Index("idx_agent_cache_hash", "agent_id", "cache_key_hash", unique=True),
     )
 
 
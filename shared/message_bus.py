@@ -3,13 +3,19 @@ Message Bus - Inter-agent communication system.
 
 Provides pub/sub messaging between agents using an in-memory implementation.
 Can be extended to use Redis, RabbitMQ, or other message brokers.
+
+Envelopes built inside the bus use Message.model_construct since their fields
+originate in-process. Broker adapters receiving messages from the network must
+parse them with Message.model_validate instead.
 """
 
 import asyncio
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Callable, Dict, List, Optional
-from uuid import uuid4
+import functools
+import os
+import time
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
 
 from loguru import logger
 
@@ -27,17 +33,33 @@ class MessageBus:
     - Topic-based routing
     """
     
-    def __init__(self, retention_seconds: int = 3600):
+    def __init__(
+        self,
+        retention_seconds: int = 3600,
+        max_history: int = 100_000,
+        silent_topics: Optional[Iterable[str]] = None,
+    ):
         """
         Initialize the message bus.
         
         Args:
             retention_seconds: How long to keep messages in history
+            max_history: Maximum number of messages kept in history
+            silent_topics: Topics (e.g. high-frequency ticks) never recorded in history
         """
-        self._subscribers: Dict[str, List[Callable]] = defaultdict(list)
-        self._message_history: List[Message] = []
+        # Subscribers are partitioned once at subscribe() time and stored as
+        # immutable snapshots so publish() iterates without copying
+        self._async_subs: Dict[str, Tuple[Callable, ...]] = {}
+        self._sync_subs: Dict[str, Tuple[Callable, ...]] = {}
+        self._max_history = max_history
+        self._message_history: Deque[Message] = deque(maxlen=max_history)
+        # Secondary indexes over the same messages, kept in publish order
+        self._by_topic: Dict[str, Deque[Message]] = {}
+        self._by_from_agent: Dict[str, Deque[Message]] = {}
+        self._silent_topics = set(silent_topics or ())
         self._retention_seconds = retention_seconds
-        self._pending_responses: Dict[str, asyncio.Future] = {}
+        # correlation_id -> (response future, timer that expires it)
+        self._pending_responses: Dict[str, Tuple[asyncio.Future, asyncio.TimerHandle]] = {}
         self._running = False
         self._cleanup_task: Optional[asyncio.Task] = None
         
@@ -75,14 +97,17 @@ class MessageBus:
         
         Args:
             topic: Topic name to subscribe to
-            callback: Async function to call when message arrives
+            callback: Async function to call when message arrives. Whether it
+                is async is resolved once here, unwrapping functools.partial
+                and callable objects, so publish() never re-checks it.
         
         Returns:
             Subscription ID
         """
-        subscription_id = str(uuid4())
-        self._subscribers[topic].append(callback)
-        logger.debug(f"Subscribed to topic '{topic}'")
+        subscription_id = os.urandom(16).hex()
+        subscribers = self._async_subs if self._is_async_callback(callback) else self._sync_subs
+        subscribers[topic] = subscribers.get(topic, ()) + (callback,)
+        logger.debug("Subscribed to topic '{}'", topic)
         return subscription_id
     
     def unsubscribe(self, topic: str, callback: Callable) -> None:
@@ -93,12 +118,17 @@ class MessageBus:
             topic: Topic name
             callback: Callback function to remove
         """
-        if topic in self._subscribers:
-            try:
-                self._subscribers[topic].remove(callback)
-                logger.debug(f"Unsubscribed from topic '{topic}'")
-            except ValueError:
-                pass
+        for subscribers in (self._async_subs, self._sync_subs):
+            callbacks = subscribers.get(topic, ())
+            if callback in callbacks:
+                index = callbacks.index(callback)
+                remaining = callbacks[:index] + callbacks[index + 1:]
+                if remaining:
+                    subscribers[topic] = remaining
+                else:
+                    del subscribers[topic]
+                logger.debug("Unsubscribed from topic '{}'", topic)
+                return
     
     async def publish(self, message: Message) -> None:
         """
@@ -107,37 +137,69 @@ class MessageBus:
         Args:
             message: Message to publish
         """
-        # Add to history
-        self._message_history.append(message)
-        
-        logger.debug(
-            f"Publishing message: {message.message_type} on topic '{message.topic}' "
-            f"from {message.from_agent}"
-        )
-        
-        # If this is a response to a pending request, resolve the future
-        if message.message_type == MessageType.RESPONSE and message.correlation_id:
-            if message.correlation_id in self._pending_responses:
-                future = self._pending_responses.pop(message.correlation_id)
+        # Resolve pending requests first; the waiting caller already receives
+        # the response, so it is neither recorded nor fanned out
+        if message.correlation_id and message.message_type == MessageType.RESPONSE:
+            pending = self._pending_responses.pop(message.correlation_id, None)
+            if pending is not None:
+                future, timer = pending
+                timer.cancel()
                 if not future.done():
                     future.set_result(message)
                 return
         
-        # Notify all subscribers
-        subscribers = self._subscribers.get(message.topic, [])
-        if not subscribers:
-            logger.debug(f"No subscribers for topic '{message.topic}'")
+        topic = message.topic
+        if topic not in self._silent_topics:
+            self._append_history(message)
+        
+        # Positional args defer formatting until loguru knows the record is emitted
+        logger.debug(
+            "Publishing message: {} on topic '{}' from {}",
+            message.message_type, topic, message.from_agent,
+        )
+        
+        # Subscriber tuples are replaced, never mutated, by (un)subscribe, so
+        # they are iterated directly without a per-publish copy
+        async_subs = self._async_subs.get(topic, ())
+        sync_subs = self._sync_subs.get(topic, ())
+        if not async_subs and not sync_subs:
+            logger.debug("No subscribers for topic '{}'", topic)
             return
         
-        # Call all callbacks
-        for callback in subscribers:
-            try:
-                if asyncio.iscoroutinefunction(callback):
-                    await callback(message)
-                else:
-                    callback(message)
-            except Exception as e:
-                logger.error(f"Error in subscriber callback: {e}")
+        # Sync callbacks run on the next loop iteration so they never block the publisher
+        if sync_subs:
+            loop = asyncio.get_running_loop()
+            for callback in sync_subs:
+                loop.call_soon(self._run_sync_callback, callback, message)
+        
+        # Async callbacks run concurrently
+        if async_subs:
+            results = await asyncio.gather(
+                *(callback(message) for callback in async_subs),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Error in subscriber callback: {result}")
+    
+    @staticmethod
+    def _is_async_callback(callback: Callable) -> bool:
+        """Check whether a callback returns a coroutine when called."""
+        while isinstance(callback, functools.partial):
+            callback = callback.func
+        if asyncio.iscoroutinefunction(callback):
+            return True
+        # Instances with an async __call__
+        call = getattr(type(callback), "__call__", None)
+        return call is not None and asyncio.iscoroutinefunction(call)
+    
+    @staticmethod
+    def _run_sync_callback(callback: Callable, message: Message) -> None:
+        """Invoke a synchronous subscriber, logging any error it raises."""
+        try:
+            callback(message)
+        except Exception as e:
+            logger.error(f"Error in subscriber callback: {e}")
     
     async def request(
         self,
@@ -154,7 +216,7 @@ class MessageBus:
             from_agent: Requesting agent ID
             to_agent: Target agent ID
             topic: Topic for the request
-            data: Request data
+            data: Request data (must already be valid; it is not re-validated)
             timeout: Timeout in seconds
         
         Returns:
@@ -163,10 +225,10 @@ class MessageBus:
         Raises:
             asyncio.TimeoutError: If response not received within timeout
         """
-        correlation_id = str(uuid4())
+        correlation_id = os.urandom(16).hex()
         
-        # Create request message
-        request_msg = Message(
+        # Create request message (trusted in-process data, skip validation)
+        request_msg = Message.model_construct(
             from_agent=from_agent,
             to_agent=to_agent,
             message_type=MessageType.REQUEST,
@@ -175,21 +237,29 @@ class MessageBus:
             correlation_id=correlation_id,
         )
         
-        # Create future for response
-        future = asyncio.Future()
-        self._pending_responses[correlation_id] = future
+        # Create future for response, expired by a timer rather than wait_for
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        timer = loop.call_later(timeout, self._expire_pending, correlation_id)
+        self._pending_responses[correlation_id] = (future, timer)
         
-        # Publish request
-        await self.publish(request_msg)
-        
-        # Wait for response
         try:
-            response = await asyncio.wait_for(future, timeout=timeout)
-            return response
-        except asyncio.TimeoutError:
-            # Cleanup
-            self._pending_responses.pop(correlation_id, None)
-            raise
+            # Publish request
+            await self.publish(request_msg)
+            
+            # Wait for response
+            return await future
+        finally:
+            # Drop the entry if we exit without a response (e.g. cancellation)
+            pending = self._pending_responses.pop(correlation_id, None)
+            if pending is not None:
+                pending[1].cancel()
+    
+    def _expire_pending(self, correlation_id: str) -> None:
+        """Fail a pending request whose timeout elapsed."""
+        pending = self._pending_responses.pop(correlation_id, None)
+        if pending is not None and not pending[0].done():
+            pending[0].set_exception(asyncio.TimeoutError())
     
     async def respond(
         self,
@@ -203,13 +273,13 @@ class MessageBus:
         Args:
             original_message: The request message being responded to
             from_agent: Responding agent ID
-            data: Response data
+            data: Response data (must already be valid; it is not re-validated)
         """
         if not original_message.correlation_id:
             logger.warning("Cannot respond to message without correlation_id")
             return
         
-        response_msg = Message(
+        response_msg = Message.model_construct(
             from_agent=from_agent,
             to_agent=original_message.from_agent,
             message_type=MessageType.RESPONSE,
@@ -237,15 +307,64 @@ class MessageBus:
         Returns:
             List of messages
         """
-        messages = self._message_history
+        if limit <= 0:
+            return []
         
-        if topic:
-            messages = [m for m in messages if m.topic == topic]
+        # Pick the narrowest index that satisfies the filters
+        if topic and from_agent:
+            by_topic = self._by_topic.get(topic, ())
+            by_agent = self._by_from_agent.get(from_agent, ())
+            if len(by_topic) <= len(by_agent):
+                source = (m for m in reversed(by_topic) if m.from_agent == from_agent)
+            else:
+                source = (m for m in reversed(by_agent) if m.topic == topic)
+        elif topic:
+            source = reversed(self._by_topic.get(topic, ()))
+        elif from_agent:
+            source = reversed(self._by_from_agent.get(from_agent, ()))
+        else:
+            source = reversed(self._message_history)
         
-        if from_agent:
-            messages = [m for m in messages if m.from_agent == from_agent]
+        # Walk from the newest message backwards so only the tail is touched
+        result = list(islice(source, limit))
+        result.reverse()
+        return result
+    
+    def _append_history(self, message: Message) -> None:
+        """Append a message to the history and its topic/sender indexes."""
+        if self._max_history <= 0:
+            return
+        
+        # Evict explicitly so the indexes never outlive the main history
+        if len(self._message_history) >= self._max_history:
+            self._drop_oldest()
+        
+        self._message_history.append(message)
+        
+        by_topic = self._by_topic.get(message.topic)
+        if by_topic is None:
+            by_topic = self._by_topic[message.topic] = deque()
+        by_topic.append(message)
+        
+        by_agent = self._by_from_agent.get(message.from_agent)
+        if by_agent is None:
+            by_agent = self._by_from_agent[message.from_agent] = deque()
+        by_agent.append(message)
+    
+    def _drop_oldest(self) -> None:
+        """Remove the oldest message from the history and its indexes."""
+        message = self._message_history.popleft()
         
-        return messages[-limit:]
+        # The oldest overall message is also the oldest in each of its indexes
+        for index, key in (
+            (self._by_topic, message.topic),
+            (self._by_from_agent, message.from_agent),
+        ):
+            entries = index.get(key)
+            if entries:
+                entries.popleft()
+                if not entries:
+                    del index[key]
     
     async def _cleanup_loop(self) -> None:
         """Periodically cleanup old messages."""
@@ -263,16 +382,17 @@ class MessageBus:
         if not self._message_history:
             return
         
-        cutoff_time = datetime.utcnow() - timedelta(seconds=self._retention_seconds)
-        original_count = len(self._message_history)
+        cutoff_ns = time.monotonic_ns() - self._retention_seconds * 1_000_000_000
+        history = self._message_history
+        removed = 0
         
-        self._message_history = [
-            m for m in self._message_history if m.timestamp > cutoff_time
-        ]
+        # Messages are appended in publish order, so expired ones sit at the head
+        while history and history[0].created_ns <= cutoff_ns:
+            self._drop_oldest()
+            removed += 1
         
-        removed = original_count - len(self._message_history)
         if removed > 0:
-            logger.debug(f"Cleaned up {removed} old messages")
+            logger.debug("Cleaned up {} old messages", removed)
 
 
 # Global message bus instance
@@ -287,8 +407,12 @@ def get_message_bus() -> MessageBus:
     return _message_bus
 
 
-def init_message_bus(retention_seconds: int = 3600) -> MessageBus:
+def init_message_bus(
+    retention_seconds: int = 3600,
+    max_history: int = 100_000,
+    silent_topics: Optional[Iterable[str]] = None,
+) -> MessageBus:
     """Initialize the global message bus instance."""
     global _message_bus
-    _message_bus = MessageBus(retention_seconds)
+    _message_bus = MessageBus(retention_seconds, max_history, silent_topics)
     return _message_bus
@@ -2,30 +2,19 @@
 Utility functions for 100AC.
 """
 
-import json
-from datetime import datetime
 from typing import Any, Dict
 
+import orjson
 
-def serialize_datetime(obj: Any) -> str:
-    """
-    Serialize datetime objects to ISO format strings.
-    
-    Args:
-        obj: Object to serialize
-    
-    Returns:
-        ISO format string if datetime, otherwise raises TypeError
-    """
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
 
 
 def to_json(data: Dict[str, Any], pretty: bool = False) -> str:
     """
     Convert data to JSON string.
     
+    Datetimes are serialized natively as ISO format strings.
+    
     Args:
         data: Data to convert
         pretty: Whether to pretty-print
@@ -33,9 +22,8 @@ def to_json(data: Dict[str, Any], pretty: bool = False) -> str:
     Returns:
         JSON string
     """
-    if pretty:
-        return json.dumps(data, indent=2, default=serialize_datetime)
-    return json.dumps(data, default=serialize_datetime)
+    options = (_JSON_OPTIONS | orjson.OPT_INDENT_2) if pretty else _JSON_OPTIONS
+    return orjson.dumps(data, option=options).decode()
 
 
 def from_json(json_str: str) -> Dict[str, Any]:
@@ -48,7 +36,7 @@ def from_json(json_str: str) -> Dict[str, Any]:
     Returns:
         Parsed dictionary
     """
-    return json.loads(json_str)
+    return orjson.loads(json_str)
 
 
 def format_uptime(seconds: float) -> str:
@@ -6,16 +6,247 @@ Ensures data quality and catches anomalies.
 
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple, TypedDict
 
+import numpy as np
+import pandas as pd
 from loguru import logger
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy masks are used instead
+    njit = None
+
 
 class ValidationError(Exception):
     """Raised when data validation fails."""
     pass
 
 
+# Common stock symbol pattern (supports international exchanges like .NS, .BO, etc.)
+# Also supports indices with hyphens (DX-Y.NYB) and carets (^TNX)
+# Used with fullmatch, so no anchors are needed
+_SYMBOL_PATTERN = re.compile(r'[\^]?[A-Z0-9\-]{1,12}(?:\.[A-Z]{1,5})?')
+
+# Longest string _SYMBOL_PATTERN can accept: caret + 12 chars + "." + 5-letter suffix
+_MAX_SYMBOL_LENGTH = 19
+
+# Raw inputs longer than this are rejected before they are stripped, leaving
+# room for surrounding whitespace around an otherwise valid symbol
+_MAX_RAW_SYMBOL_LENGTH = 4 * _MAX_SYMBOL_LENGTH
+
+# Reasonable price bounds (in USD)
+_MIN_PRICE = 0.01
+_MAX_PRICE = 1_000_000.0
+
+# Volume bounds
+_MIN_VOLUME = 0
+_MAX_VOLUME = 10_000_000_000
+
+
+class _QuoteRequired(TypedDict):
+    symbol: str
+    price: float
+    timestamp: datetime
+
+
+class QuoteData(_QuoteRequired, total=False):
+    """Schema of the quote dictionaries accepted by DataValidator.validate_quote."""
+    bid: Optional[float]
+    ask: Optional[float]
+    bid_size: Optional[int]
+    ask_size: Optional[int]
+    volume: Optional[int]
+    source: str
+
+
+class _HistoricalBarRequired(TypedDict):
+    symbol: str
+    date: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+
+
+class HistoricalBarData(_HistoricalBarRequired, total=False):
+    """Schema of the bar dictionaries accepted by DataValidator.validate_historical_bar."""
+    adj_close: float
+    interval: str
+    source: str
+
+
+# Required keys, derived from the schemas above (both are frozensets)
+_REQUIRED_QUOTE_FIELDS = QuoteData.__required_keys__
+_REQUIRED_BAR_FIELDS = HistoricalBarData.__required_keys__
+
+
+# Hot-path validators. Constants are bound as default arguments so lookups
+# compile to local loads; DataValidator delegates here.
+
+@lru_cache(maxsize=4096)
+def _symbol_is_valid(symbol: str, _fullmatch=_SYMBOL_PATTERN.fullmatch) -> bool:
+    """
+    Check an uppercased, stripped symbol against the symbol pattern.
+    
+    Cached per process; the same handful of symbols is validated repeatedly.
+    Callers reject normalized symbols longer than _MAX_SYMBOL_LENGTH first, so
+    oversized input never reaches the regex engine or fills the cache.
+    """
+    return _fullmatch(symbol) is not None
+
+
+def _normalize_symbol(symbol: str) -> str:
+    """Uppercase and strip a symbol, returning it as-is when already normalized."""
+    # Symbols from tickers are normally uppercase already; skip the two copies
+    if symbol.isupper() and not (symbol[0].isspace() or symbol[-1].isspace()):
+        return symbol
+    return symbol.strip().upper()
+
+
+def _validate_symbol_fast(
+    symbol: str,
+    _MAX_LEN: int = _MAX_SYMBOL_LENGTH,
+    _MAX_RAW_LEN: int = _MAX_RAW_SYMBOL_LENGTH,
+) -> bool:
+    """Validate stock symbol format. See DataValidator.validate_symbol."""
+    if not symbol:
+        raise ValidationError("Symbol cannot be empty")
+    
+    # Reject oversized input before doing any work on it
+    if len(symbol) > _MAX_RAW_LEN:
+        raise ValidationError(f"Invalid symbol format: longer than {_MAX_LEN} characters")
+    
+    symbol = _normalize_symbol(symbol)
+    
+    # The exact limit applies to the stripped symbol, before it touches the cache
+    if len(symbol) > _MAX_LEN:
+        raise ValidationError(f"Invalid symbol format: longer than {_MAX_LEN} characters")
+    
+    if not _symbol_is_valid(symbol):
+        raise ValidationError(
+            f"Invalid symbol format: {symbol}. "
+            "Expected format: Letters/numbers/hyphens (1-12 chars), optional exchange suffix (.XX)"
+        )
+    
+    return True
+
+
+def _validate_price_fast(
+    price: float,
+    field_name: str = "price",
+    allow_zero: bool = False,
+    _MIN: float = _MIN_PRICE,
+    _MAX: float = _MAX_PRICE,
+) -> bool:
+    """Validate price value. See DataValidator.validate_price."""
+    if price is None:
+        raise ValidationError(f"{field_name} cannot be None")
+    
+    # Exact type checks cover plain floats/ints; subclasses such as numpy.float64
+    # fall through to the isinstance check
+    price_type = type(price)
+    if not (price_type is float or price_type is int) and not isinstance(price, (int, float)):
+        raise ValidationError(f"{field_name} must be numeric, got {type(price)}")
+    
+    if price < 0:
+        raise ValidationError(f"{field_name} cannot be negative: {price}")
+    
+    if price == 0 and not allow_zero:
+        raise ValidationError(f"{field_name} cannot be zero")
+    
+    if price < _MIN and price != 0:
+        raise ValidationError(
+            f"{field_name} too low: {price} (min: {_MIN})"
+        )
+    
+    if price > _MAX:
+        raise ValidationError(
+            f"{field_name} too high: {price} (max: {_MAX})"
+        )
+    
+    return True
+
+
+def _validate_volume_fast(
+    volume: int,
+    allow_zero: bool = True,
+    _MAX: int = _MAX_VOLUME,
+) -> bool:
+    """Validate volume value. See DataValidator.validate_volume."""
+    if volume is None:
+        raise ValidationError("Volume cannot be None")
+    
+    if type(volume) is not int and not isinstance(volume, int):
+        raise ValidationError(f"Volume must be integer, got {type(volume)}")
+    
+    if volume < 0:
+        raise ValidationError(f"Volume cannot be negative: {volume}")
+    
+    if volume == 0 and not allow_zero:
+        raise ValidationError("Volume cannot be zero")
+    
+    if volume > _MAX:
+        raise ValidationError(
+            f"Volume too high: {volume} (max: {_MAX})"
+        )
+    
+    return True
+
+
+def _first_invalid_bar_numpy(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    min_price: float,
+    max_price: float,
+    max_volume: float,
+) -> int:
+    """
+    Index of the first bar failing price, OHLC or volume checks, or -1.
+    
+    Built from the DataValidator masks, which apply the module bounds; the
+    bound arguments only keep the signature interchangeable with the kernel.
+    """
+    mask = DataValidator.invalid_ohlc_mask(open_, high, low, close)
+    if volume.shape[0]:
+        mask |= DataValidator.invalid_volume_mask(volume)
+    bad = np.flatnonzero(mask)
+    return int(bad[0]) if bad.size else -1
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _first_invalid_bar(open_, high, low, close, volume, min_price, max_price, max_volume):
+        """Fused single pass over the columns; stops at the first invalid bar."""
+        check_volume = volume.shape[0] > 0
+        for i in range(open_.shape[0]):
+            o = open_[i]
+            h = high[i]
+            l = low[i]
+            c = close[i]
+            if (
+                o < min_price or o > max_price
+                or h < min_price or h > max_price
+                or l < min_price or l > max_price
+                or c < min_price or c > max_price
+                or h < l or h < o or h < c or l > o or l > c
+            ):
+                return i
+            if check_volume and (volume[i] < 0 or volume[i] > max_volume):
+                return i
+        return -1
+else:
+    _first_invalid_bar = _first_invalid_bar_numpy
+
+
+_NO_VOLUME = np.empty(0, dtype=np.float64)
+
+
 class DataValidator:
     """
     Validates market data for quality and correctness.
@@ -28,17 +259,18 @@ class DataValidator:
     - Data completeness
     """
     
-    # Common stock symbol pattern (supports international exchanges like .NS, .BO, etc.)
-    # Also supports indices with hyphens (DX-Y.NYB) and carets (^TNX)
-    SYMBOL_PATTERN = re.compile(r'^[\^]?[A-Z0-9\-]{1,12}(\.[A-Z]{1,5})?$')
+    # Read-only aliases of the module constants, kept for callers that read
+    # them. Every validator uses the module constants, so overriding these on
+    # the class or a subclass changes nothing.
+    SYMBOL_PATTERN = _SYMBOL_PATTERN
+    MAX_SYMBOL_LENGTH = _MAX_SYMBOL_LENGTH
+    MIN_PRICE = _MIN_PRICE
+    MAX_PRICE = _MAX_PRICE
+    MIN_VOLUME = _MIN_VOLUME
+    MAX_VOLUME = _MAX_VOLUME
     
-    # Reasonable price bounds (in USD)
-    MIN_PRICE = 0.01
-    MAX_PRICE = 1_000_000.0
-    
-    # Volume bounds
-    MIN_VOLUME = 0
-    MAX_VOLUME = 10_000_000_000
+    # Characters stripped by sanitize_symbol
+    _SANITIZE_RE = re.compile(r'[^A-Z.]')
     
     @classmethod
     def validate_symbol(cls, symbol: str) -> bool:
@@ -54,18 +286,7 @@ class DataValidator:
         Raises:
             ValidationError: If symbol is invalid
         """
-        if not symbol:
-            raise ValidationError("Symbol cannot be empty")
-        
-        symbol = symbol.upper().strip()
-        
-        if not cls.SYMBOL_PATTERN.match(symbol):
-            raise ValidationError(
-                f"Invalid symbol format: {symbol}. "
-                "Expected format: Letters/numbers/hyphens (1-12 chars), optional exchange suffix (.XX)"
-            )
-        
-        return True
+        return _validate_symbol_fast(symbol)
     
     @classmethod
     def validate_price(
@@ -88,29 +309,7 @@ class DataValidator:
         Raises:
             ValidationError: If price is invalid
         """
-        if price is None:
-            raise ValidationError(f"{field_name} cannot be None")
-        
-        if not isinstance(price, (int, float)):
-            raise ValidationError(f"{field_name} must be numeric, got {type(price)}")
-        
-        if price < 0:
-            raise ValidationError(f"{field_name} cannot be negative: {price}")
-        
-        if price == 0 and not allow_zero:
-            raise ValidationError(f"{field_name} cannot be zero")
-        
-        if price < cls.MIN_PRICE and price != 0:
-            raise ValidationError(
-                f"{field_name} too low: {price} (min: {cls.MIN_PRICE})"
-            )
-        
-        if price > cls.MAX_PRICE:
-            raise ValidationError(
-                f"{field_name} too high: {price} (max: {cls.MAX_PRICE})"
-            )
-        
-        return True
+        return _validate_price_fast(price, field_name, allow_zero)
     
     @classmethod
     def validate_volume(cls, volume: int, allow_zero: bool = True) -> bool:
@@ -127,24 +326,7 @@ class DataValidator:
         Raises:
             ValidationError: If volume is invalid
         """
-        if volume is None:
-            raise ValidationError("Volume cannot be None")
-        
-        if not isinstance(volume, int):
-            raise ValidationError(f"Volume must be integer, got {type(volume)}")
-        
-        if volume < 0:
-            raise ValidationError(f"Volume cannot be negative: {volume}")
-        
-        if volume == 0 and not allow_zero:
-            raise ValidationError("Volume cannot be zero")
-        
-        if volume > cls.MAX_VOLUME:
-            raise ValidationError(
-                f"Volume too high: {volume} (max: {cls.MAX_VOLUME})"
-            )
-        
-        return True
+        return _validate_volume_fast(volume, allow_zero)
     
     @classmethod
     def validate_ohlc(
@@ -169,11 +351,19 @@ class DataValidator:
         Raises:
             ValidationError: If OHLC relationship is invalid
         """
-        # Validate individual prices
-        cls.validate_price(open_price, "open")
-        cls.validate_price(high, "high")
-        cls.validate_price(low, "low")
-        cls.validate_price(close, "close")
+        # Validate individual prices with one fused bounds check; anything
+        # outside the fast path goes through _validate_price_fast for its error
+        min_price = _MIN_PRICE
+        max_price = _MAX_PRICE
+        for field_name, price in (
+            ("open", open_price), ("high", high), ("low", low), ("close", close)
+        ):
+            price_type = type(price)
+            if not (
+                (price_type is float or price_type is int)
+                and min_price <= price <= max_price
+            ):
+                _validate_price_fast(price, field_name)
         
         # Check relationships
         if high < low:
@@ -191,18 +381,269 @@ class DataValidator:
                 f"Low ({low}) must be <= open ({open_price}) and close ({close})"
             )
         
-        # Check for suspicious spreads (> 50%)
-        spread_pct = ((high - low) / low) * 100 if low > 0 else 0
-        if spread_pct > 50:
+        # Check for suspicious spreads (> 50%) without dividing; the percentage
+        # is only computed when the warning fires, and positional args leave
+        # formatting to loguru
+        if low > 0 and (high - low) > 0.5 * low:
             logger.warning(
-                f"Suspicious OHLC spread: {spread_pct:.1f}% "
-                f"(H:{high}, L:{low}, O:{open_price}, C:{close})"
+                "Suspicious OHLC spread: {:.1f}% (H:{}, L:{}, O:{}, C:{})",
+                (high - low) / low * 100, high, low, open_price, close,
             )
         
         return True
     
     @classmethod
-    def validate_quote(cls, quote_data: Dict[str, Any]) -> bool:
+    def invalid_ohlc_mask(
+        cls,
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Flag bars that would fail validate_ohlc, without per-row Python calls.
+        
+        Args:
+            open_: Open prices
+            high: High prices
+            low: Low prices
+            close: Close prices
+        
+        Returns:
+            Boolean array, True where the bar is invalid
+        """
+        open_ = np.asarray(open_, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        close = np.asarray(close, dtype=np.float64)
+        
+        # MIN_PRICE > 0, so this also rejects zero and negative prices
+        mask = (open_ < _MIN_PRICE) | (open_ > _MAX_PRICE)
+        for prices in (high, low, close):
+            mask |= (prices < _MIN_PRICE) | (prices > _MAX_PRICE)
+        
+        mask |= (high < low) | (high < open_) | (high < close)
+        mask |= (low > open_) | (low > close)
+        return mask
+    
+    @staticmethod
+    def suspicious_spread_mask(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+        """
+        Flag bars whose high-low spread would trigger validate_ohlc's warning.
+        
+        Args:
+            high: High prices
+            low: Low prices
+        
+        Returns:
+            Boolean array, True where the spread exceeds 50% of the low
+        """
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        return (low > 0) & ((high - low) > 0.5 * low)
+    
+    @classmethod
+    def first_invalid_bar(
+        cls,
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: Optional[np.ndarray] = None,
+    ) -> int:
+        """
+        Find the first bar that would fail validate_ohlc (or validate_volume).
+        
+        Uses a compiled single-pass kernel when numba is installed, otherwise
+        the NumPy masks.
+        
+        Args:
+            open_: Open prices
+            high: High prices
+            low: Low prices
+            close: Close prices
+            volume: Optional volumes
+        
+        Returns:
+            Index of the first invalid bar, or -1 if all are valid
+        """
+        return int(_first_invalid_bar(
+            np.ascontiguousarray(open_, dtype=np.float64),
+            np.ascontiguousarray(high, dtype=np.float64),
+            np.ascontiguousarray(low, dtype=np.float64),
+            np.ascontiguousarray(close, dtype=np.float64),
+            _NO_VOLUME if volume is None else np.ascontiguousarray(volume, dtype=np.float64),
+            _MIN_PRICE,
+            _MAX_PRICE,
+            float(_MAX_VOLUME),
+        ))
+    
+    @classmethod
+    def validate_ohlc_arrays(
+        cls,
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+    ) -> bool:
+        """
+        Validate OHLC price relationships for a whole batch of bars.
+        
+        Args:
+            open_: Open prices
+            high: High prices
+            low: Low prices
+            close: Close prices
+        
+        Returns:
+            True if every bar is valid
+        
+        Raises:
+            ValidationError: Describing the first invalid bar
+        """
+        i = cls.first_invalid_bar(open_, high, low, close)
+        if i >= 0:
+            try:
+                cls.validate_ohlc(float(open_[i]), float(high[i]), float(low[i]), float(close[i]))
+            except ValidationError as e:
+                raise ValidationError(f"Bar {i}: {e}") from e
+            raise ValidationError(f"Bar {i}: invalid OHLC values")
+        
+        return True
+    
+    @classmethod
+    def invalid_ohlc_frame_mask(cls, frame: pd.DataFrame) -> np.ndarray:
+        """
+        Flag rows of an OHLCV frame (yfinance column layout) that fail validation.
+        
+        Args:
+            frame: DataFrame with Open, High, Low, Close and Volume columns
+        
+        Returns:
+            Boolean array, True where the OHLC prices or volume are invalid
+        """
+        mask = cls.invalid_ohlc_mask(
+            frame['Open'].to_numpy(),
+            frame['High'].to_numpy(),
+            frame['Low'].to_numpy(),
+            frame['Close'].to_numpy(),
+        )
+        mask |= cls.invalid_volume_mask(frame['Volume'].to_numpy())
+        return mask
+    
+    @classmethod
+    def validate_ohlc_frame(cls, frame: pd.DataFrame) -> bool:
+        """
+        Validate every bar of an OHLCV frame (yfinance column layout).
+        
+        Args:
+            frame: DataFrame with Open, High, Low, Close and Volume columns
+        
+        Returns:
+            True if every bar is valid
+        
+        Raises:
+            ValidationError: Describing the first invalid bar
+        """
+        i = cls.first_invalid_bar(
+            frame['Open'].to_numpy(),
+            frame['High'].to_numpy(),
+            frame['Low'].to_numpy(),
+            frame['Close'].to_numpy(),
+            frame['Volume'].to_numpy(),
+        )
+        if i >= 0:
+            row = frame.iloc[i]
+            try:
+                cls.validate_ohlc(
+                    float(row['Open']), float(row['High']), float(row['Low']), float(row['Close'])
+                )
+                _validate_volume_fast(int(row['Volume']))
+            except ValidationError as e:
+                raise ValidationError(f"Bar {frame.index[i]}: {e}") from e
+            raise ValidationError(f"Bar {frame.index[i]}: invalid OHLCV values")
+        
+        return True
+    
+    @classmethod
+    def invalid_volume_mask(cls, volumes: np.ndarray) -> np.ndarray:
+        """
+        Flag volumes that would fail validate_volume (zero allowed).
+        
+        Args:
+            volumes: Volumes
+        
+        Returns:
+            Boolean array, True where the volume is invalid
+        """
+        volumes = np.asarray(volumes)
+        return (volumes < _MIN_VOLUME) | (volumes > _MAX_VOLUME)
+    
+    @classmethod
+    def validate_volumes_array(cls, volumes: np.ndarray) -> bool:
+        """
+        Validate a whole batch of volumes.
+        
+        Args:
+            volumes: Volumes
+        
+        Returns:
+            True if every volume is valid
+        
+        Raises:
+            ValidationError: Describing the first invalid volume
+        """
+        bad = np.nonzero(cls.invalid_volume_mask(volumes))[0]
+        if bad.size:
+            i = int(bad[0])
+            try:
+                _validate_volume_fast(int(volumes[i]))
+            except ValidationError as e:
+                raise ValidationError(f"Bar {i}: {e}") from e
+            raise ValidationError(f"Bar {i}: invalid volume")
+        
+        return True
+    
+    @classmethod
+    def validate_dates_array(cls, dates: Iterable) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Parse a batch of dates in one vectorized pass.
+        
+        Args:
+            dates: Dates as datetimes, Timestamps or parseable strings
+        
+        Returns:
+            Tuple of (parsed dates, boolean array True where a date is invalid)
+        """
+        parsed = pd.DatetimeIndex(pd.to_datetime(dates, errors="coerce"))
+        return parsed, np.asarray(parsed.isna())
+    
+    @classmethod
+    def validate_symbols_array(cls, symbols: Iterable[str]) -> bool:
+        """
+        Validate a batch of symbols.
+        
+        Args:
+            symbols: Symbols to validate
+        
+        Returns:
+            True if every symbol is valid
+        
+        Raises:
+            ValidationError: For the first invalid symbol
+        """
+        for symbol in symbols:
+            if not symbol or len(symbol) > _MAX_RAW_SYMBOL_LENGTH:
+                _validate_symbol_fast(symbol)
+            normalized = _normalize_symbol(symbol)
+            if len(normalized) > _MAX_SYMBOL_LENGTH or not _symbol_is_valid(normalized):
+                # Re-run the scalar path for its error message
+                _validate_symbol_fast(symbol)
+        
+        return True
+    
+    @classmethod
+    def validate_quote(cls, quote_data: QuoteData) -> bool:
         """
         Validate a complete quote data dictionary.
         
@@ -215,51 +656,51 @@ class DataValidator:
         Raises:
             ValidationError: If quote data is invalid
         """
-        required_fields = ["symbol", "price", "timestamp"]
+        # One set difference covers every required key; None values are
+        # rejected by the individual validators below
+        missing = _REQUIRED_QUOTE_FIELDS - quote_data.keys()
+        if missing:
+            raise ValidationError("Missing required field: " + ", ".join(sorted(missing)))
         
-        # Check required fields
-        for field in required_fields:
-            if field not in quote_data:
-                raise ValidationError(f"Missing required field: {field}")
+        get = quote_data.get
+        symbol = quote_data["symbol"]
+        price = quote_data["price"]
+        timestamp = quote_data["timestamp"]
         
         # Validate symbol
-        cls.validate_symbol(quote_data["symbol"])
+        _validate_symbol_fast(symbol)
         
         # Validate price
-        cls.validate_price(quote_data["price"])
+        _validate_price_fast(price)
         
         # Validate timestamp
-        if not isinstance(quote_data["timestamp"], datetime):
+        if type(timestamp) is not datetime and not isinstance(timestamp, datetime):
             raise ValidationError("Timestamp must be a datetime object")
         
         # Validate optional bid/ask
-        if "bid" in quote_data and quote_data["bid"] is not None:
-            cls.validate_price(quote_data["bid"], "bid")
+        bid = get("bid")
+        if bid is not None:
+            _validate_price_fast(bid, "bid")
         
-        if "ask" in quote_data and quote_data["ask"] is not None:
-            cls.validate_price(quote_data["ask"], "ask")
+        ask = get("ask")
+        if ask is not None:
+            _validate_price_fast(ask, "ask")
         
         # Check bid/ask relationship
-        if (
-            "bid" in quote_data
-            and "ask" in quote_data
-            and quote_data["bid"] is not None
-            and quote_data["ask"] is not None
-        ):
-            if quote_data["bid"] > quote_data["ask"]:
-                raise ValidationError(
-                    f"Bid ({quote_data['bid']}) cannot be greater than "
-                    f"ask ({quote_data['ask']})"
-                )
+        if bid is not None and ask is not None and bid > ask:
+            raise ValidationError(
+                f"Bid ({bid}) cannot be greater than ask ({ask})"
+            )
         
         # Validate volume if present
-        if "volume" in quote_data and quote_data["volume"] is not None:
-            cls.validate_volume(quote_data["volume"])
+        volume = get("volume")
+        if volume is not None:
+            _validate_volume_fast(volume)
         
         return True
     
     @classmethod
-    def validate_historical_bar(cls, bar_data: Dict[str, Any]) -> bool:
+    def validate_historical_bar(cls, bar_data: HistoricalBarData) -> bool:
         """
         Validate a historical price bar.
         
@@ -272,33 +713,39 @@ class DataValidator:
         Raises:
             ValidationError: If bar data is invalid
         """
-        required_fields = ["symbol", "date", "open", "high", "low", "close", "volume"]
-        
-        # Check required fields
-        for field in required_fields:
-            if field not in bar_data:
-                raise ValidationError(f"Missing required field: {field}")
+        missing = _REQUIRED_BAR_FIELDS - bar_data.keys()
+        if missing:
+            raise ValidationError("Missing required field: " + ", ".join(sorted(missing)))
+        
+        symbol = bar_data["symbol"]
+        date = bar_data["date"]
+        open_price = bar_data["open"]
+        high = bar_data["high"]
+        low = bar_data["low"]
+        close = bar_data["close"]
+        volume = bar_data["volume"]
         
         # Validate symbol
-        cls.validate_symbol(bar_data["symbol"])
+        _validate_symbol_fast(symbol)
         
         # Validate OHLC
-        cls.validate_ohlc(
-            bar_data["open"],
-            bar_data["high"],
-            bar_data["low"],
-            bar_data["close"],
-        )
+        cls.validate_ohlc(open_price, high, low, close)
         
         # Validate volume
-        cls.validate_volume(bar_data["volume"])
+        _validate_volume_fast(volume)
         
         # Validate date
-        if not isinstance(bar_data["date"], datetime):
+        # Exact check first; pandas Timestamps fall through to isinstance
+        if type(date) is not datetime and not isinstance(date, datetime):
             raise ValidationError("Date must be a datetime object")
         
         return True
     
+    @classmethod
+    def clear_symbol_cache(cls) -> None:
+        """Clear cached symbol validation results."""
+        _symbol_is_valid.cache_clear()
+    
     @classmethod
     def sanitize_symbol(cls, symbol: str) -> str:
         """
@@ -317,6 +764,7 @@ class DataValidator:
         symbol = symbol.strip().upper()
         
         # Remove any invalid characters
-        symbol = re.sub(r'[^A-Z\.]', '', symbol)
+        symbol = cls._SANITIZE_RE.sub('', symbol)
         
         return symbol
+
@@ -1,14 +1,227 @@
 """
 Test configuration and fixtures.
+
+All async tests and fixtures share one session-wide event loop (see
+asyncio_default_*_loop_scope in pyproject.toml), so the bus and database
+fixtures can outlive a single test. The in-memory database is created once
+per session; each test that uses it runs inside a transaction that is rolled
+back afterwards.
+
+yfinance is replaced by an offline fake for every test; tests that need the
+live API are marked ``network`` and only run with ``--run-network``.
 """
 
 import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
 import pytest
+import pytest_asyncio
+from sqlalchemy import Connection, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from shared.database.connection import init_database
+from shared.message_bus import init_message_bus
+
+
+@pytest_asyncio.fixture(scope="module")
+async def bus():
+    """Message bus shared by the tests in a module."""
+    bus = init_message_bus()
+    await bus.start()
+    yield bus
+    await bus.stop()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def db():
+    """
+    In-memory database shared by the whole session.
+    
+    aiosqlite ":memory:" engines use StaticPool, so every session sees the one
+    connection and the schema is only created once.
+    
+    The driver normally defers BEGIN until the first write, so a SAVEPOINT
+    would open (and its RELEASE commit) an implicit transaction of its own.
+    SQLAlchemy's SQLite recipe hands BEGIN to SQLAlchemy instead, which keeps
+    db_rollback's savepoints inside its outer transaction.
+    """
+    db = init_database("sqlite+aiosqlite:///:memory:")
+    await db.initialize()
+    async with db.engine.connect() as conn:
+        await conn.run_sync(_disable_driver_transactions)
+    event.listen(db.engine.sync_engine, "begin", _emit_begin)
+    yield db
+    await db.close()
+
+
+def _disable_driver_transactions(connection: Connection) -> None:
+    """Stop the sqlite3 driver from starting transactions on its own."""
+    connection.connection.dbapi_connection.isolation_level = None
+
+
+def _emit_begin(connection: Connection) -> None:
+    """Start every SQLAlchemy transaction with an explicit BEGIN."""
+    connection.exec_driver_sql("BEGIN")
+
+
+class _TaskLock:
+    """asyncio lock that the task holding it can acquire again."""
+    
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._owner = None
+        self._depth = 0
+    
+    async def acquire(self) -> None:
+        task = asyncio.current_task()
+        if self._owner is not task:
+            await self._lock.acquire()
+            self._owner = task
+        self._depth += 1
+    
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+            self._lock.release()
+
+
+class _SavepointSession(AsyncSession):
+    """
+    Test session that holds the shared connection's lock while it is open.
+    
+    Every test session works in its own SAVEPOINT on one connection. SQLite
+    savepoints form a stack, so sessions from concurrent tasks (the agents use
+    asyncio.gather) would release each other's savepoints; they take turns
+    instead. A session nested in the same task simply re-enters the lock.
+    """
+    
+    async def __aenter__(self):
+        await self.info["connection_lock"].acquire()
+        return await super().__aenter__()
+    
+    async def __aexit__(self, *exc_info):
+        try:
+            await super().__aexit__(*exc_info)
+        finally:
+            self.info["connection_lock"].release()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def db_rollback(request):
+    """Run each test that uses the database in a transaction rolled back afterwards."""
+    if "db" not in request.fixturenames:
+        yield
+        return
+    
+    db = request.getfixturevalue("db")
+    session_factory = db.session_factory
+    async with db.engine.connect() as conn:
+        transaction = await conn.begin()
+        # Each session runs in a SAVEPOINT inside the outer transaction: its
+        # commit only releases the savepoint and its rollback (e.g. get_session
+        # handling an error) only undoes that session's work, so the outer
+        # transaction stays open and is what the teardown rolls back
+        db.session_factory = async_sessionmaker(
+            bind=conn,
+            class_=_SavepointSession,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+            info={"connection_lock": _TaskLock()},
+        )
+        try:
+            yield
+            # Fail loudly if the test's writes could have escaped the rollback
+            assert transaction.is_active, "outer test transaction ended early; writes may have leaked"
+        finally:
+            db.session_factory = session_factory
+            if transaction.is_active:
+                await transaction.rollback()
+
+
+# Symbols known to the fake yfinance: name and reference price. Anything else
+# behaves like an unknown ticker (empty info, empty history).
+FAKE_SYMBOLS = {
+    "AAPL": ("Apple Inc.", 185.0),
+    "MSFT": ("Microsoft Corporation", 375.0),
+    "GOOGL": ("Alphabet Inc.", 140.0),
+}
+
+
+class FakeTicker:
+    """Offline stand-in for yfinance.Ticker with deterministic data."""
+    
+    def __init__(self, symbol: str):
+        self.symbol = symbol.upper()
+        self._known = FAKE_SYMBOLS.get(self.symbol)
+    
+    @property
+    def info(self) -> dict:
+        if self._known is None:
+            return {}
+        name, price = self._known
+        return {
+            "shortName": name,
+            "currentPrice": price,
+            "regularMarketPrice": price,
+            "bid": round(price - 0.05, 2),
+            "ask": round(price + 0.05, 2),
+            "bidSize": 100,
+            "askSize": 100,
+            "volume": 50_000_000,
+        }
+    
+    @property
+    def fast_info(self) -> SimpleNamespace:
+        if self._known is None:
+            raise KeyError(f"Unknown symbol: {self.symbol}")
+        return SimpleNamespace(last_price=self._known[1])
+    
+    def history(self, start=None, end=None, interval: str = "1d", **kwargs) -> pd.DataFrame:
+        """Return one bar per business day in [start, end), like yfinance."""
+        columns = ["Open", "High", "Low", "Close", "Volume"]
+        if self._known is None:
+            return pd.DataFrame(columns=columns)
+        
+        end = end or datetime.now()
+        dates = pd.bdate_range(start=start, end=end, inclusive="left")
+        # Seed from the symbol so repeated calls return identical bars
+        rng = np.random.default_rng(sum(map(ord, self.symbol)))
+        base = self._known[1]
+        close = base * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        open_ = close * (1 + rng.normal(0, 0.003, len(dates)))
+        high = np.maximum(open_, close) * 1.005
+        low = np.minimum(open_, close) * 0.995
+        volume = rng.integers(1_000_000, 100_000_000, len(dates))
+        return pd.DataFrame(
+            {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+            index=dates,
+        )
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-network",
+        action="store_true",
+        default=False,
+        help="run tests marked 'network' against the live yfinance API",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-network"):
+        return
+    skip_network = pytest.mark.skip(reason="needs --run-network")
+    for item in items:
+        if "network" in item.keywords:
+            item.add_marker(skip_network)
 
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+@pytest.fixture(autouse=True)
+def mock_yfinance(request, monkeypatch):
+    """Route yfinance.Ticker to FakeTicker unless the test is marked 'network'."""
+    if "network" not in request.keywords:
+        monkeypatch.setattr("yfinance.Ticker", FakeTicker)
@@ -3,11 +3,6 @@ Tests for the test agent.
 """
 
 import asyncio
-import sys
-from pathlib import Path
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pytest
 
@@ -0,0 +1,232 @@
+"""
+Tests for database connection helpers.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from agents.data.market_data_fetcher import MarketDataFetcher
+from shared.database.connection import Database
+from shared.database.models import AgentCache, HistoricalPrice, MarketQuote
+
+# market_quotes as created before idx_symbol_timestamp became unique
+OLD_MARKET_QUOTES_SCHEMA = """
+CREATE TABLE market_quotes (
+    id INTEGER NOT NULL,
+    symbol VARCHAR(20) NOT NULL,
+    timestamp DATETIME NOT NULL,
+    price FLOAT NOT NULL,
+    bid FLOAT,
+    ask FLOAT,
+    bid_size INTEGER,
+    ask_size INTEGER,
+    volume INTEGER,
+    source VARCHAR(50) NOT NULL,
+    created_at DATETIME NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE INDEX idx_symbol_timestamp ON market_quotes (symbol, timestamp);
+CREATE INDEX ix_market_quotes_timestamp ON market_quotes (timestamp);
+CREATE INDEX ix_market_quotes_symbol ON market_quotes (symbol);
+"""
+
+# agent_cache as created before entries were indexed by cache_key_hash
+OLD_AGENT_CACHE_SCHEMA = """
+CREATE TABLE agent_cache (
+    id INTEGER NOT NULL,
+    agent_id VARCHAR(100) NOT NULL,
+    cache_key VARCHAR(255) NOT NULL,
+    cache_value TEXT NOT NULL,
+    created_at DATETIME NOT NULL,
+    expires_at DATETIME,
+    extra_info TEXT,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX idx_agent_cache_key ON agent_cache (agent_id, cache_key);
+CREATE INDEX ix_agent_cache_agent_id ON agent_cache (agent_id);
+CREATE INDEX ix_agent_cache_created_at ON agent_cache (created_at);
+"""
+
+
+def create_old_database(path, schema: str) -> str:
+    """Create a SQLite file with an older schema and return its async URL."""
+    conn = sqlite3.connect(path)
+    conn.executescript(schema)
+    conn.close()
+    return f"sqlite+aiosqlite:///{path}"
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert():
+    """Test bulk inserting rows across several chunks."""
+    db = Database("sqlite+aiosqlite:///:memory:")
+    await db.initialize()
+    
+    start = datetime(2024, 1, 1)
+    rows = [
+        {
+            "symbol": "TEST",
+            "date": start + timedelta(days=i),
+            "open": 100.0,
+            "high": 101.0,
+            "low": 99.0,
+            "close": 100.5,
+            "volume": 1000,
+        }
+        for i in range(25)
+    ]
+    
+    inserted = await db.bulk_insert(HistoricalPrice, rows, chunk_size=10)
+    assert inserted == 25
+    assert await db.bulk_insert(HistoricalPrice, []) == 0
+    
+    async with db.get_session() as session:
+        count = await session.scalar(select(func.count()).select_from(HistoricalPrice))
+    assert count == 25
+    
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_execute_raw():
+    """Test raw SQL goes straight to the driver with positional params."""
+    db = Database("sqlite+aiosqlite:///:memory:")
+    await db.initialize()
+    
+    await db.execute_raw(
+        "INSERT INTO agent_cache (agent_id, cache_key, cache_key_hash, cache_value, created_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        ("agent", "key", b"\x00" * 8, "value", datetime(2024, 1, 1)),
+    )
+    await db.execute_raw("ANALYZE")
+    
+    async with db.get_session() as session:
+        count = await session.scalar(select(func.count()).select_from(AgentCache))
+    assert count == 1
+    
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_store_quote_upgrades_old_schema(tmp_path):
+    """Test quotes upsert into a database whose quote index predates the unique one."""
+    url = create_old_database(tmp_path / "old.db", OLD_MARKET_QUOTES_SCHEMA)
+    conn = sqlite3.connect(tmp_path / "old.db")
+    conn.executemany(
+        "INSERT INTO market_quotes (symbol, timestamp, price, source, created_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            ("AAPL", "2024-01-02 15:30:00.000000", 150.0, "old", "2024-01-02 15:30:00.000000"),
+            ("AAPL", "2024-01-02 15:30:00.000000", 151.0, "old", "2024-01-02 15:30:00.000000"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    
+    db = Database(url)
+    await db.initialize()
+    fetcher = MarketDataFetcher()
+    fetcher.db = db
+    
+    await fetcher._store_quote({
+        "symbol": "AAPL",
+        "timestamp": datetime(2024, 1, 2, 15, 30),
+        "price": 152.0,
+        "source": "yfinance",
+    })
+    
+    async with db.get_session() as session:
+        prices = (await session.scalars(select(MarketQuote.price))).all()
+    assert prices == [152.0]
+    
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_agent_cache_upgrades_old_schema(tmp_path):
+    """Test the loader cache works on a database whose agent_cache predates cache_key_hash."""
+    from agents.data.historical_data_loader import HistoricalDataLoader
+    
+    url = create_old_database(tmp_path / "old.db", OLD_AGENT_CACHE_SCHEMA)
+    db = Database(url)
+    await db.initialize()
+    loader = HistoricalDataLoader()
+    loader.db = db
+    
+    bars = [{"date": "2024-01-02", "close": 100.0}]
+    await loader._save_to_cache("AAPL_1d_2024-01-01_2024-01-31", bars)
+    
+    assert await loader._get_from_cache("AAPL_1d_2024-01-01_2024-01-31") == bars
+    assert await loader._get_from_cache("MSFT_1d_2024-01-01_2024-01-31") is None
+    
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_agent_cache_ignores_digest_collisions(db):
+    """Test a cached entry is only returned for its own key, not one sharing its digest."""
+    from agents.data.historical_data_loader import HistoricalDataLoader
+    from shared.database.models import hash_cache_key
+    
+    loader = HistoricalDataLoader()
+    await db.bulk_insert(AgentCache, [{
+        "agent_id": loader.agent_id,
+        "cache_key": "other_key",
+        # Pretend "other_key" collides with the key looked up below
+        "cache_key_hash": hash_cache_key("wanted_key"),
+        "cache_value": "[]",
+        "created_at": datetime.utcnow(),
+        "expires_at": datetime.utcnow() + timedelta(hours=1),
+    }])
+    
+    assert await loader._get_from_cache("wanted_key") is None
+
+
+# Written by test_failed_session_keeps_test_isolated, which the next test checks is gone
+LEAK_SYMBOL = "LEAKCHECK"
+
+
+@pytest.mark.asyncio
+async def test_failed_session_keeps_test_isolated(db):
+    """Test an agent's DB error mid-test does not end the per-test rollback."""
+    row = {
+        "symbol": LEAK_SYMBOL,
+        "date": datetime(2024, 1, 2),
+        "open": 100.0,
+        "high": 101.0,
+        "low": 99.0,
+        "close": 100.5,
+        "volume": 1000,
+    }
+    await db.bulk_insert(HistoricalPrice, [row])
+    
+    # The fetcher swallows the NOT NULL failure after get_session rolls back
+    fetcher = MarketDataFetcher()
+    await fetcher._store_quote(
+        {"symbol": LEAK_SYMBOL, "timestamp": datetime(2024, 1, 2), "price": None}
+    )
+    
+    await db.bulk_insert(HistoricalPrice, [{**row, "date": datetime(2024, 1, 3)}])
+    
+    async with db.get_session() as session:
+        count = await session.scalar(
+            select(func.count())
+            .select_from(HistoricalPrice)
+            .where(HistoricalPrice.symbol == LEAK_SYMBOL)
+        )
+    assert count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_session_writes_were_rolled_back(db):
+    """Test nothing from the previous test persisted past its teardown."""
+    async with db.get_session() as session:
+        count = await session.scalar(
+            select(func.count())
+            .select_from(HistoricalPrice)
+            .where(HistoricalPrice.symbol == LEAK_SYMBOL)
+        )
+    assert count == 0
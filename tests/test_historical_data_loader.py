@@ -9,22 +9,22 @@ Tests all capabilities:
 """
 
 import pytest
+import pytest_asyncio
 from datetime import datetime, timedelta
+from loguru import logger
 from agents.data.historical_data_loader import HistoricalDataLoader
-from shared.message_bus import MessageBus
-from shared.database.connection import Database
+from shared.data_models import Message, MessageType
+from tests.conftest import FakeTicker
 
 
-def init_message_bus():
-    """Initialize message bus for testing."""
-    bus = MessageBus()
-    return bus
-
-
-def init_database(db_url: str = "sqlite+aiosqlite:///:memory:"):
-    """Initialize database for testing."""
-    db = Database(db_url)
-    return db
+@pytest_asyncio.fixture(scope="module")
+async def agent(bus, db):
+    """Historical data loader shared by the tests in this module."""
+    agent = HistoricalDataLoader()
+    await agent.initialize()
+    await agent.start()
+    yield agent
+    await agent.stop()
 
 
 @pytest.mark.asyncio
@@ -44,19 +44,8 @@ async def test_historical_data_loader_metadata():
 
 
 @pytest.mark.asyncio
-async def test_load_history_valid_symbol():
+async def test_load_history_valid_symbol(agent):
     """Test loading historical data for a valid symbol."""
-    # Initialize dependencies
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = HistoricalDataLoader()
-    await agent.initialize()
-    await agent.start()
-    
     # Test parameters: AAPL for last 30 days
     end_date = datetime.now()
     start_date = end_date - timedelta(days=30)
@@ -69,7 +58,6 @@ async def test_load_history_valid_symbol():
     }
     
     # Create message
-    from shared.data_models import Message, MessageType
     message = Message(
         from_agent="test",
         to_agent=agent.agent_id,
@@ -105,32 +93,17 @@ async def test_load_history_valid_symbol():
     assert first_bar["low"] <= first_bar["open"]
     assert first_bar["low"] <= first_bar["close"]
     
-    # Cleanup
-    await agent.stop()
-    await bus.stop()
-    await db.close()
 
 
 @pytest.mark.asyncio
-async def test_load_history_invalid_symbol():
+async def test_load_history_invalid_symbol(agent):
     """Test loading history for an invalid symbol."""
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = HistoricalDataLoader()
-    await agent.initialize()
-    await agent.start()
-    
     params = {
         "symbol": "INVALIDSYMBOL123",
         "start_date": "2024-01-01",
         "end_date": "2024-01-31"
     }
     
-    from shared.data_models import Message, MessageType
     message = Message(
         from_agent="test",
         to_agent=agent.agent_id,
@@ -144,32 +117,17 @@ async def test_load_history_invalid_symbol():
     # Should fail - no data for invalid symbol
     assert result["success"] is False
     assert "error" in result
-    
-    await agent.stop()
-    await bus.stop()
-    await db.close()
 
 
 @pytest.mark.asyncio
-async def test_load_history_invalid_interval():
+async def test_load_history_invalid_interval(agent):
     """Test with invalid interval parameter."""
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = HistoricalDataLoader()
-    await agent.initialize()
-    await agent.start()
-    
     params = {
         "symbol": "AAPL",
         "start_date": "2024-01-01",
         "interval": "invalid_interval"
     }
     
-    from shared.data_models import Message, MessageType
     message = Message(
         from_agent="test",
         to_agent=agent.agent_id,
@@ -182,25 +140,11 @@ async def test_load_history_invalid_interval():
     
     assert result["success"] is False
     assert "Invalid interval" in result["error"]
-    
-    await agent.stop()
-    await bus.stop()
-    await db.close()
 
 
 @pytest.mark.asyncio
-async def test_load_batch_history():
+async def test_load_batch_history(agent):
     """Test loading history for multiple symbols."""
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = HistoricalDataLoader()
-    await agent.initialize()
-    await agent.start()
-    
     params = {
         "symbols": ["AAPL", "MSFT", "GOOGL"],
         "start_date": "2024-01-01",
@@ -208,7 +152,6 @@ async def test_load_batch_history():
         "interval": "1d"
     }
     
-    from shared.data_models import Message, MessageType
     message = Message(
         from_agent="test",
         to_agent=agent.agent_id,
@@ -231,26 +174,12 @@ async def test_load_batch_history():
     # Check summary
     summary = result["summary"]
     assert summary["total"] == 3
-    assert summary["success_count"] > 0
-    
-    await agent.stop()
-    await bus.stop()
-    await db.close()
+    assert summary["success_count"] == 3
 
 
 @pytest.mark.asyncio
-async def test_get_available_dates():
+async def test_get_available_dates(agent):
     """Test getting available cached dates for a symbol."""
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = HistoricalDataLoader()
-    await agent.initialize()
-    await agent.start()
-    
     # First load some data
     load_params = {
         "symbol": "AAPL",
@@ -258,7 +187,6 @@ async def test_get_available_dates():
         "end_date": "2024-01-31"
     }
     
-    from shared.data_models import Message, MessageType
     load_msg = Message(
         from_agent="test",
         to_agent=agent.agent_id,
@@ -288,25 +216,11 @@ async def test_get_available_dates():
     assert "earliest" in result
     assert "latest" in result
     assert result["earliest"] == "2024-01-01" or result["earliest"] > "2024-01-01"  # Market may be closed on Jan 1
-    
-    await agent.stop()
-    await bus.stop()
-    await db.close()
 
 
 @pytest.mark.asyncio
-async def test_update_incremental():
+async def test_update_incremental(agent):
     """Test incremental update fetching only new bars."""
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = HistoricalDataLoader()
-    await agent.initialize()
-    await agent.start()
-    
     # First load: January 2024
     load_params = {
         "symbol": "MSFT",
@@ -314,7 +228,6 @@ async def test_update_incremental():
         "end_date": "2024-01-31"
     }
     
-    from shared.data_models import Message, MessageType
     load_msg = Message(
         from_agent="test",
         to_agent=agent.agent_id,
@@ -344,32 +257,17 @@ async def test_update_incremental():
     assert "latest_date" in update_result
     # Should have fetched data after Jan 31
     assert update_result["latest_date"] > "2024-01-31"
-    
-    await agent.stop()
-    await bus.stop()
-    await db.close()
 
 
 @pytest.mark.asyncio
-async def test_cache_functionality():
+async def test_cache_functionality(agent):
     """Test that caching works correctly."""
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = HistoricalDataLoader()
-    await agent.initialize()
-    await agent.start()
-    
     params = {
         "symbol": "AAPL",
         "start_date": "2024-01-01",
         "end_date": "2024-01-10"
     }
     
-    from shared.data_models import Message, MessageType
     message = Message(
         from_agent="test",
         to_agent=agent.agent_id,
@@ -388,7 +286,38 @@ async def test_cache_functionality():
     assert result2["success"] is True
     assert result2["cached"] is True
     assert result2["count"] == result1["count"]
+
+
+@pytest.mark.asyncio
+async def test_suspicious_spread_is_logged(agent, monkeypatch):
+    """Test a valid bar with a >50% high/low spread still logs a warning."""
+    class WideSpreadTicker(FakeTicker):
+        def history(self, *args, **kwargs):
+            hist = super().history(*args, **kwargs)
+            hist.iloc[0, hist.columns.get_loc("High")] = hist["Low"].iloc[0] * 2
+            return hist
+    
+    monkeypatch.setattr("yfinance.Ticker", WideSpreadTicker)
+    warnings = []
+    handler_id = logger.add(warnings.append, level="WARNING", format="{message}")
     
-    await agent.stop()
-    await bus.stop()
-    await db.close()
+    params = {
+        "symbol": "MSFT",
+        "start_date": "2023-03-01",
+        "end_date": "2023-03-15",
+        "interval": "1d",
+    }
+    message = Message(
+        from_agent="test",
+        to_agent=agent.agent_id,
+        message_type=MessageType.REQUEST,
+        topic="load_history",
+        data=params
+    )
+    try:
+        result = await agent.process_request(message)
+    finally:
+        logger.remove(handler_id)
+    
+    assert result["success"] is True
+    assert sum("Suspicious OHLC spread" in str(w) for w in warnings) == 1
@@ -3,22 +3,26 @@ Tests for Agent #1: Market Data Fetcher
 """
 
 import asyncio
-import sys
 from datetime import datetime
-from pathlib import Path
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
 import pytest
+import pytest_asyncio
 
 from agents.data.market_data_fetcher import MarketDataFetcher
-from shared.database.connection import init_database
 from shared.data_models import Message, MessageType
-from shared.message_bus import init_message_bus
 from shared.validators import DataValidator, ValidationError
 
 
+@pytest_asyncio.fixture(scope="module")
+async def agent(bus, db):
+    """Market data fetcher shared by the tests in this module."""
+    agent = MarketDataFetcher()
+    await agent.start()
+    yield agent
+    await agent.stop()
+
+
 @pytest.mark.asyncio
 async def test_market_data_fetcher_metadata():
     """Test agent metadata."""
@@ -32,19 +36,8 @@ async def test_market_data_fetcher_metadata():
 
 
 @pytest.mark.asyncio
-async def test_fetch_price_valid_symbol():
+async def test_fetch_price_valid_symbol(agent):
     """Test fetching price for a valid symbol."""
-    # Initialize dependencies
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")  # Use in-memory database for testing
-    await db.initialize()
-    
-    # Create agent
-    agent = MarketDataFetcher()
-    await agent.start()
-    
     # Test with AAPL
     request = Message(
         from_agent="tester",
@@ -63,24 +56,11 @@ async def test_fetch_price_valid_symbol():
     assert isinstance(result["price"], (int, float))
     assert result["price"] > 0
     assert result["source"] == "yfinance"
-    
-    await agent.stop()
-    await bus.stop()
-    await db.close()
 
 
 @pytest.mark.asyncio
-async def test_fetch_price_invalid_symbol():
+async def test_fetch_price_invalid_symbol(agent):
     """Test fetching price for an invalid symbol."""
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = MarketDataFetcher()
-    await agent.start()
-    
     # Test with invalid symbol
     request = Message(
         from_agent="tester",
@@ -94,24 +74,11 @@ async def test_fetch_price_invalid_symbol():
     result = await agent.process_request(request)
     
     assert "error" in result
-    
-    await agent.stop()
-    await bus.stop()
-    await db.close()
 
 
 @pytest.mark.asyncio
-async def test_validate_symbol():
+async def test_validate_symbol(agent):
     """Test symbol validation."""
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = MarketDataFetcher()
-    await agent.start()
-    
     # Test valid symbol
     request = Message(
         from_agent="tester",
@@ -127,10 +94,6 @@ async def test_validate_symbol():
     assert result["symbol"] == "GOOGL"
     assert result["valid"] is True
     assert "company_name" in result
-    
-    await agent.stop()
-    await bus.stop()
-    await db.close()
 
 
 @pytest.mark.asyncio
@@ -174,17 +137,8 @@ async def test_data_validator():
 
 
 @pytest.mark.asyncio
-async def test_fetch_batch():
+async def test_fetch_batch(agent):
     """Test batch fetching multiple symbols."""
-    bus = init_message_bus()
-    await bus.start()
-    
-    db = init_database("sqlite+aiosqlite:///:memory:")
-    await db.initialize()
-    
-    agent = MarketDataFetcher()
-    await agent.start()
-    
     # Test batch fetch
     request = Message(
         from_agent="tester",
@@ -201,10 +155,6 @@ async def test_fetch_batch():
     assert "errors" in result
     assert result["total"] == 3
     assert result["successful"] >= 1  # At least some should succeed
-    
-    await agent.stop()
-    await bus.stop()
-    await db.close()
 
 
 @pytest.mark.asyncio
@@ -213,3 +163,175 @@ async def test_symbol_sanitization():
     assert DataValidator.sanitize_symbol("  aapl  ") == "AAPL"
     assert DataValidator.sanitize_symbol("brk.a") == "BRK.A"
     assert DataValidator.sanitize_symbol("MSFT123") == "MSFT"  # Removes numbers
+
+
+@pytest.mark.asyncio
+async def test_validate_ohlc_arrays():
+    """Test vectorized OHLC validation."""
+    open_ = np.array([100.0, 100.0, 100.0])
+    high = np.array([105.0, 90.0, 105.0])
+    low = np.array([99.0, 99.0, 99.0])
+    close = np.array([103.0, 95.0, 103.0])
+    
+    mask = DataValidator.invalid_ohlc_mask(open_, high, low, close)
+    assert mask.tolist() == [False, True, False]
+    
+    with pytest.raises(ValidationError, match="Bar 1"):
+        DataValidator.validate_ohlc_arrays(open_, high, low, close)
+    
+    assert DataValidator.validate_ohlc_arrays(
+        open_[[0, 2]], high[[0, 2]], low[[0, 2]], close[[0, 2]]
+    )
+    
+    volumes = np.array([0, 1_000_000, 20_000_000_000], dtype=np.int64)
+    assert DataValidator.invalid_volume_mask(volumes).tolist() == [False, False, True]
+    assert DataValidator.validate_volumes_array(volumes[:2])
+    with pytest.raises(ValidationError, match="Bar 2: Volume too high"):
+        DataValidator.validate_volumes_array(volumes)
+    
+    # Class attributes are aliases only; the vectorized and scalar paths share the module bounds
+    class StrictValidator(DataValidator):
+        MAX_PRICE = 50.0
+    
+    assert StrictValidator.invalid_ohlc_mask(open_, high, low, close).tolist() == mask.tolist()
+    assert StrictValidator.validate_ohlc(100.0, 105.0, 99.0, 103.0)
+    
+    assert DataValidator.validate_symbols_array(["AAPL", "brk.a", "^TNX"])
+    with pytest.raises(ValidationError):
+        DataValidator.validate_symbols_array(["AAPL", "BAD SYMBOL"])
+
+
+@pytest.mark.asyncio
+async def test_symbol_validation_cache():
+    """Test repeated symbol validation is served from the cache."""
+    from shared.validators import _symbol_is_valid
+    
+    DataValidator.clear_symbol_cache()
+    for _ in range(3):
+        assert DataValidator.validate_symbol("aapl ")
+    
+    info = _symbol_is_valid.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+    
+    # Oversized input is rejected before it is normalized or cached
+    with pytest.raises(ValidationError, match="longer than"):
+        DataValidator.validate_symbol("a" * 10_000)
+    with pytest.raises(ValidationError, match="longer than"):
+        DataValidator.validate_symbols_array(["AAPL", "b" * 10_000])
+    with pytest.raises(ValidationError, match="longer than"):
+        DataValidator.validate_symbol("  " + "C" * 20 + "  ")
+    assert _symbol_is_valid.cache_info().currsize == 1
+    
+    # Surrounding whitespace does not count towards the symbol length
+    padded = "  AAPL  " + " " * 20
+    assert DataValidator.validate_symbol(padded)
+    assert DataValidator.validate_symbols_array([padded, "msft"])
+
+
+@pytest.mark.asyncio
+async def test_validate_quote_and_bar():
+    """Test quote and historical bar validation."""
+    now = datetime.now()
+    quote = {
+        "symbol": "AAPL",
+        "price": 150.0,
+        "timestamp": now,
+        "bid": 149.9,
+        "ask": 150.1,
+        "volume": 1000,
+    }
+    assert DataValidator.validate_quote(quote)
+    
+    with pytest.raises(ValidationError, match="Missing required field: price"):
+        DataValidator.validate_quote({"symbol": "AAPL", "timestamp": now})
+    
+    with pytest.raises(ValidationError, match="Bid"):
+        DataValidator.validate_quote({**quote, "bid": 151.0})
+    
+    bar = {
+        "symbol": "AAPL",
+        "date": now,
+        "open": 100.0,
+        "high": 105.0,
+        "low": 99.0,
+        "close": 103.0,
+        "volume": 1000,
+    }
+    assert DataValidator.validate_historical_bar(bar)
+    
+    with pytest.raises(ValidationError, match="Missing required field: volume"):
+        DataValidator.validate_historical_bar({k: v for k, v in bar.items() if k != "volume"})
+    
+    with pytest.raises(ValidationError, match="Volume cannot be None"):
+        DataValidator.validate_historical_bar({**bar, "volume": None})
+
+
+@pytest.mark.network
+@pytest.mark.asyncio
+async def test_fetch_price_live(agent):
+    """Test fetching a price from the live yfinance API."""
+    request = Message(
+        from_agent="tester",
+        to_agent="market_data_fetcher",
+        message_type=MessageType.REQUEST,
+        topic="fetch_price",
+        data={"symbol": "AAPL"},
+        correlation_id="test_005",
+    )
+    
+    result = await agent.process_request(request)
+    
+    assert "error" not in result
+    assert result["price"] > 0
+
+
+@pytest.mark.asyncio
+async def test_validate_dates_array():
+    """Test vectorized date parsing."""
+    parsed, invalid = DataValidator.validate_dates_array(
+        ["2024-01-02", "not a date", datetime(2024, 1, 3)]
+    )
+    
+    assert invalid.tolist() == [False, True, False]
+    assert parsed[0] == datetime(2024, 1, 2)
+
+
+@pytest.mark.asyncio
+async def test_validate_ohlc_frame():
+    """Test OHLCV frame validation in yfinance layout."""
+    import pandas as pd
+    
+    frame = pd.DataFrame(
+        {
+            "Open": [100.0, 100.0],
+            "High": [105.0, 105.0],
+            "Low": [99.0, 99.0],
+            "Close": [103.0, 103.0],
+            "Volume": [1000, -5],
+        },
+        index=pd.to_datetime(["2024-01-02", "2024-01-03"]),
+    )
+    
+    assert DataValidator.invalid_ohlc_frame_mask(frame).tolist() == [False, True]
+    with pytest.raises(ValidationError, match="2024-01-03.*Volume cannot be negative"):
+        DataValidator.validate_ohlc_frame(frame)
+    assert DataValidator.validate_ohlc_frame(frame.iloc[:1])
+
+
+@pytest.mark.asyncio
+async def test_first_invalid_bar_matches_numpy_fallback():
+    """Test the compiled kernel (if numba is installed) agrees with the NumPy path."""
+    from shared.validators import _first_invalid_bar, _first_invalid_bar_numpy, _NO_VOLUME
+    
+    open_ = np.array([100.0, 100.0, 100.0, 100.0])
+    high = np.array([105.0, 105.0, 105.0, 90.0])
+    low = np.array([99.0, 99.0, 99.0, 99.0])
+    close = np.array([103.0, 103.0, 103.0, 95.0])
+    volume = np.array([1000.0, 1000.0, -1.0, 1000.0])
+    bounds = (DataValidator.MIN_PRICE, DataValidator.MAX_PRICE, float(DataValidator.MAX_VOLUME))
+    
+    for kernel in (_first_invalid_bar, _first_invalid_bar_numpy):
+        assert kernel(open_, high, low, close, volume, *bounds) == 2
+        assert kernel(open_, high, low, close, _NO_VOLUME, *bounds) == 3
+        assert kernel(open_[:2], high[:2], low[:2], close[:2], volume[:2], *bounds) == -1
@@ -3,11 +3,8 @@ Tests for the message bus.
 """
 
 import asyncio
-import sys
-from pathlib import Path
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+import functools
+from datetime import datetime
 
 import pytest
 
@@ -15,6 +12,17 @@ from shared.data_models import Message, MessageType
 from shared.message_bus import MessageBus
 
 
+@pytest.fixture
+def bus(bus):
+    """The module's shared, started bus with subscribers and history cleared."""
+    bus._async_subs.clear()
+    bus._sync_subs.clear()
+    bus._message_history.clear()
+    bus._by_topic.clear()
+    bus._by_from_agent.clear()
+    return bus
+
+
 @pytest.mark.asyncio
 async def test_message_bus_init():
     """Test message bus initialization."""
@@ -36,15 +44,14 @@ async def test_message_bus_start_stop():
 
 
 @pytest.mark.asyncio
-async def test_subscribe_and_publish():
+async def test_subscribe_and_publish(bus):
     """Test subscribing to topics and publishing messages."""
-    bus = MessageBus()
-    await bus.start()
-    
     received_messages = []
+    received = asyncio.Event()
     
     async def callback(message: Message):
         received_messages.append(message)
+        received.set()
     
     # Subscribe to topic
     bus.subscribe("test_topic", callback)
@@ -58,22 +65,17 @@ async def test_subscribe_and_publish():
     )
     await bus.publish(message)
     
-    # Give time for processing
-    await asyncio.sleep(0.1)
+    # Wait for delivery rather than a fixed delay
+    await asyncio.wait_for(received.wait(), timeout=1.0)
     
     # Check message was received
     assert len(received_messages) == 1
     assert received_messages[0].data["key"] == "value"
-    
-    await bus.stop()
 
 
 @pytest.mark.asyncio
-async def test_request_response():
+async def test_request_response(bus):
     """Test request-response pattern."""
-    bus = MessageBus()
-    await bus.start()
-    
     # Set up responder
     async def responder(message: Message):
         if message.message_type == MessageType.REQUEST:
@@ -85,36 +87,38 @@ async def test_request_response():
     
     bus.subscribe("request_topic", responder)
     
-    # Send request and wait for response
-    response = await bus.request(
-        from_agent="requester",
-        to_agent="responder",
-        topic="request_topic",
-        data={"query": "test"},
-        timeout=5.0,
+    # Send request and wait for response; it must arrive well before the
+    # request's own timeout, not when the timer fires
+    response = await asyncio.wait_for(
+        bus.request(
+            from_agent="requester",
+            to_agent="responder",
+            topic="request_topic",
+            data={"query": "test"},
+            timeout=5.0,
+        ),
+        timeout=0.5,
     )
     
     assert response.data["result"] == "success"
     assert response.message_type == MessageType.RESPONSE
-    
-    await bus.stop()
+    assert bus._pending_responses == {}
 
 
 @pytest.mark.asyncio
-async def test_message_history():
+async def test_message_history(bus):
     """Test message history tracking."""
-    bus = MessageBus()
-    await bus.start()
-    
     # Publish some messages
-    for i in range(5):
-        message = Message(
+    messages = [
+        Message(
             from_agent=f"agent_{i}",
             message_type=MessageType.EVENT,
             topic="test_topic",
             data={"index": i},
         )
-        await bus.publish(message)
+        for i in range(5)
+    ]
+    await asyncio.gather(*(bus.publish(message) for message in messages))
     
     # Get history
     history = bus.get_history(topic="test_topic", limit=10)
@@ -124,5 +128,210 @@ async def test_message_history():
     history = bus.get_history(from_agent="agent_0")
     assert len(history) == 1
     assert history[0].data["index"] == 0
+
+
+@pytest.mark.asyncio
+async def test_message_history_bounded():
+    """Test history is capped and expired messages are trimmed from the head."""
+    bus = MessageBus(retention_seconds=60, max_history=3)
     
-    await bus.stop()
+    for i in range(5):
+        await bus.publish(Message(
+            from_agent="agent",
+            message_type=MessageType.EVENT,
+            topic="test_topic",
+            data={"index": i},
+        ))
+    
+    history = bus.get_history()
+    assert [m.data["index"] for m in history] == [2, 3, 4]
+    
+    # Age the oldest message past the retention window
+    bus._message_history[0].created_ns -= 120 * 1_000_000_000
+    bus._cleanup_old_messages()
+    
+    history = bus.get_history()
+    assert [m.data["index"] for m in history] == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_message_history_indexes():
+    """Test filtered history queries stay consistent with evictions."""
+    bus = MessageBus(max_history=4)
+    
+    for i in range(6):
+        await bus.publish(Message(
+            from_agent=f"agent_{i % 2}",
+            message_type=MessageType.EVENT,
+            topic=f"topic_{i % 3}",
+            data={"index": i},
+        ))
+    
+    # Only messages 2..5 are retained
+    assert [m.data["index"] for m in bus.get_history(from_agent="agent_0")] == [2, 4]
+    assert [m.data["index"] for m in bus.get_history(topic="topic_0")] == [3]
+    assert [m.data["index"] for m in bus.get_history(topic="topic_2", from_agent="agent_1")] == [5]
+    assert bus.get_history(topic="topic_0", from_agent="agent_0") == []
+    assert [m.data["index"] for m in bus.get_history(limit=2)] == [4, 5]
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_sync_and_async_subscribers(bus):
+    """Test async subscribers run concurrently and sync ones are dispatched."""
+    both_started = asyncio.Event()
+    started = []
+    sync_received = []
+    
+    async def slow_callback(message: Message):
+        started.append(message.topic)
+        if len(started) == 2:
+            both_started.set()
+        # Would deadlock if subscribers were awaited one after another
+        await asyncio.wait_for(both_started.wait(), timeout=1.0)
+    
+    async def other_slow_callback(message: Message):
+        await slow_callback(message)
+    
+    async def failing_callback(message: Message):
+        raise RuntimeError("boom")
+    
+    bus.subscribe("fan_out", slow_callback)
+    bus.subscribe("fan_out", other_slow_callback)
+    bus.subscribe("fan_out", failing_callback)
+    bus.subscribe("fan_out", sync_received.append)
+    
+    message = Message(
+        from_agent="test_agent",
+        message_type=MessageType.EVENT,
+        topic="fan_out",
+        data={},
+    )
+    await bus.publish(message)
+    await asyncio.sleep(0)
+    
+    assert both_started.is_set()
+    assert sync_received == [message]
+
+
+@pytest.mark.asyncio
+async def test_subscribe_detects_wrapped_async_callbacks(bus):
+    """Test partials and async callable objects are dispatched as coroutines."""
+    received = []
+    
+    async def tagged_callback(tag: str, message: Message):
+        received.append(tag)
+    
+    class AsyncHandler:
+        async def __call__(self, message: Message):
+            received.append("object")
+    
+    bus.subscribe("wrapped", functools.partial(tagged_callback, "partial"))
+    bus.subscribe("wrapped", AsyncHandler())
+    
+    await bus.publish(Message(
+        from_agent="test_agent",
+        message_type=MessageType.EVENT,
+        topic="wrapped",
+        data={},
+    ))
+    
+    assert sorted(received) == ["object", "partial"]
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe(bus):
+    """Test unsubscribing stops delivery and drops empty topics."""
+    received = []
+    
+    async def callback(message: Message):
+        received.append(message)
+    
+    bus.subscribe("test_topic", callback)
+    bus.unsubscribe("test_topic", callback)
+    bus.unsubscribe("test_topic", callback)  # Removing twice is a no-op
+    
+    await bus.publish(Message(
+        from_agent="test_agent",
+        message_type=MessageType.EVENT,
+        topic="test_topic",
+        data={},
+    ))
+    
+    assert received == []
+    assert "test_topic" not in bus._async_subs
+
+
+@pytest.mark.asyncio
+async def test_publish_many_same_topic():
+    """Test repeated publishes reuse the topic's subscriber tuple."""
+    bus = MessageBus(silent_topics=["many"])
+    received = []
+    
+    async def callback(message: Message):
+        received.append(message.data["index"])
+    
+    bus.subscribe("many", callback)
+    handlers = bus._async_subs["many"]
+    
+    for i in range(10_000):
+        await bus.publish(Message(
+            from_agent="feed",
+            message_type=MessageType.EVENT,
+            topic="many",
+            data={"index": i},
+        ))
+    
+    assert len(received) == 10_000
+    assert received[-1] == 9_999
+    assert bus._async_subs["many"] is handlers
+
+
+@pytest.mark.asyncio
+async def test_silent_topics_skip_history():
+    """Test silent topics are delivered but not recorded."""
+    bus = MessageBus(silent_topics=["ticks"])
+    received = []
+    
+    async def callback(message: Message):
+        received.append(message)
+    
+    bus.subscribe("ticks", callback)
+    await bus.publish(Message(
+        from_agent="feed",
+        message_type=MessageType.EVENT,
+        topic="ticks",
+        data={"price": 1.0},
+    ))
+    
+    assert len(received) == 1
+    assert bus.get_history(topic="ticks") == []
+
+
+@pytest.mark.asyncio
+async def test_request_timeout(bus):
+    """Test a request without a responder times out and is cleaned up."""
+    with pytest.raises(asyncio.TimeoutError):
+        await bus.request(
+            from_agent="requester",
+            to_agent="nobody",
+            topic="unanswered_topic",
+            data={},
+            timeout=0.01,
+        )
+    
+    assert bus._pending_responses == {}
+
+
+@pytest.mark.asyncio
+async def test_message_json_timestamp_is_iso8601():
+    """Test messages serialize datetimes as ISO 8601 without custom encoders."""
+    timestamp = datetime(2024, 1, 2, 3, 4, 5, 6)
+    message = Message(
+        from_agent="test_agent",
+        message_type=MessageType.EVENT,
+        topic="test_topic",
+        data={},
+        timestamp=timestamp,
+    )
+    
+    assert f'"timestamp":"{timestamp.isoformat()}"' in message.model_dump_json()